@@ -0,0 +1,338 @@
+"""
+A benchmark of the solvers on a fixed corpus of each kind of puzzle,
+reporting search rates, latency percentiles and peak memory, with
+results that can be saved as JSON and compared against a baseline
+
+Run from this directory as
+
+    python benchmark.py [--repeat N] [--warmup N] [--only PREFIX]
+                        [--json RESULTS] [--baseline BASELINE]
+
+which exits with status 1 if any case is slower than BASELINE by more
+than the tolerance, or searches a different number of nodes.
+"""
+import json
+import platform
+import tracemalloc
+from random import Random
+from time import perf_counter
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle, neighbour_table
+from mn_puzzle_tools import ida_star_solve
+from puzzle_tools import (SearchStats, astar_solve, bidirectional_solve,
+                          breadth_first_solve, depth_first_solve)
+from sudoku_dlx import dlx_solve
+from sudoku_puzzle import SudokuPuzzle
+from word_index import WordIndex, load_word_set
+from word_ladder_puzzle import WordLadderPuzzle
+
+# the shortest time in seconds to measure at once; faster cases are
+# solved several times over for each measurement, as by timeit
+_MIN_SAMPLE = 0.02
+# the solvers that can record a SearchStats, so report nodes searched
+_COUNTING = {astar_solve, bidirectional_solve, breadth_first_solve,
+             depth_first_solve, dlx_solve, ida_star_solve}
+# the fewest samples for which each reported percentile, by the nearest
+# rank method, is not simply the slowest sample
+_PERCENTILE_SAMPLES = {90: 10, 99: 100}
+# timed samples of each case by default, enough for a distinct p90
+_REPEAT = 20
+# sudoku grids by difficulty, from the demonstration in sudoku_puzzle
+_SUDOKUS = {
+    "1star": ["***7*8*1*", "**7*9***6", "9*31*****", "35*8**6*1",
+              "*********", "1*6**9*48", "*****12*7", "8***7*4**",
+              "*6*3*2***"],
+    "3star": ["***9*2***", "*91***63*", "*3**7**8*", "3*******8",
+              "**9***2**", "5*******7", "*7**8**4*", "*45***81*",
+              "***3*6***"],
+    "4star": ["56***7**9", "*7**48*31", "*********", "43*******",
+              "*8*****9*", "*******26", "*********", "19*36**7*",
+              "7**1***42"]}
+# word ladders by the number of words on a shortest path
+_LADDERS = [("cold", "warm"), ("same", "cost"), ("shore", "beach")]
+# peg solitaire boards by size, each with one empty cell
+_PEG_BOARDS = {
+    "5x5": ["*****", "*****", "*****", "**.**", "*****"],
+    "6x6": ["******", "******", "******", "******", "*.****", "******"],
+    "7x7": ["##***##", "##***##", "*******", "***.***", "*******",
+            "##***##", "##***##"]}
+
+
+def scrambled(n, m, moves, seed):
+    """
+    Return an n by m MNPuzzle made from its goal by moves random moves
+    of the blank, never directly undoing the previous move, with the
+    moves chosen by a Random seeded with seed.
+
+    The shortest solution is at most moves long, and may be shorter.
+
+    @type n: int
+    @type m: int
+    @type moves: int
+    @type seed: int
+    @rtype: MNPuzzle
+
+    >>> print(scrambled(2, 3, 1, 0))
+    123
+    4*5
+    >>> scrambled(3, 3, 20, 0) == scrambled(3, 3, 20, 0)
+    True
+    """
+    symbols = [str(i) for i in range(1, n * m)] + ["*"]
+    board, blank, back = symbols[:], n * m - 1, None
+    rand = Random(seed)
+    neighbours = neighbour_table(n, m)
+    for _ in range(moves):
+        cell = rand.choice([c for c in neighbours[blank] if c != back])
+        board[blank], board[cell] = board[cell], board[blank]
+        blank, back = cell, blank
+    return MNPuzzle(tuple([tuple(board[r * m:r * m + m]) for r in range(n)]),
+                    tuple([tuple(symbols[r * m:r * m + m])
+                           for r in range(n)]))
+
+
+def corpus():
+    """
+    Return the benchmark's cases, each a name, a puzzle and a solver
+    for it.
+
+    Every case is built the same way each time, so results from
+    different runs can be compared.
+
+    @rtype: list[(str, Puzzle, (Puzzle) -> PuzzleNode | None)]
+    """
+    cases = []
+    for moves in (10, 20, 30):
+        puzzle = scrambled(3, 3, moves, moves)
+        if moves <= 20:
+            cases.append(("mn-3x3-{}/bfs".format(moves), puzzle,
+                          breadth_first_solve))
+        cases.append(("mn-3x3-{}/astar".format(moves), puzzle, astar_solve))
+        cases.append(("mn-3x3-{}/idastar".format(moves), puzzle,
+                      ida_star_solve))
+    puzzle = scrambled(3, 4, 40, 40)
+    cases.append(("mn-3x4-40/astar", puzzle, astar_solve))
+    cases.append(("mn-3x4-40/idastar", puzzle, ida_star_solve))
+    cases.append(("mn-4x4-80/idastar", scrambled(4, 4, 80, 80),
+                  ida_star_solve))
+    digits = set("123456789")
+    for difficulty in sorted(_SUDOKUS):
+        symbols = list("".join(_SUDOKUS[difficulty]))
+        cases.append(("sudoku-{}/dfs".format(difficulty),
+                      SudokuPuzzle(9, symbols, digits), depth_first_solve))
+        cases.append(("sudoku-{}/dfs-mrv".format(difficulty),
+                      SudokuPuzzle(9, symbols, digits, mrv=True,
+                                   propagate=True), depth_first_solve))
+        cases.append(("sudoku-{}/dlx".format(difficulty),
+                      SudokuPuzzle(9, symbols, digits), dlx_solve))
+    index = WordIndex(load_word_set("words.txt"))
+    for from_word, to_word in _LADDERS:
+        puzzle = WordLadderPuzzle(from_word, to_word, index)
+        name = "ladder-{}-{}".format(from_word, to_word)
+        cases.append((name + "/bfs", puzzle, breadth_first_solve))
+        cases.append((name + "/astar", puzzle, astar_solve))
+        cases.append((name + "/bidirectional", puzzle, bidirectional_solve))
+    for size in sorted(_PEG_BOARDS):
+        puzzle = GridPegSolitairePuzzle(
+            [list(row) for row in _PEG_BOARDS[size]], {"*", ".", "#"})
+        cases.append(("peg-{}/dfs".format(size), puzzle, depth_first_solve))
+    return cases
+
+
+def percentile(values, p):
+    """
+    Return the p-th percentile of the non-empty list values, by the
+    nearest rank method.
+
+    @type values: list[float]
+    @type p: float
+    @rtype: float
+
+    >>> percentile([4, 1, 3, 2], 50)
+    2
+    >>> percentile([4, 1, 3, 2], 90)
+    4
+    >>> percentile([4, 1, 3, 2], 0)
+    1
+    """
+    ordered = sorted(values)
+    rank = -(-p * len(ordered) // 100)
+    return ordered[max(int(rank), 1) - 1]
+
+
+def run_case(puzzle, solver, repeat=_REPEAT, warmup=1):
+    """
+    Return measurements of solving puzzle with solver: latency
+    percentiles over repeat timed samples after warmup untimed solves
+    (at least one, which sets how many solves make a sample), the
+    nodes expanded and expanded per second where solver records a
+    SearchStats, and the peak memory traced while solving once more.
+
+    A percentile is None if there are too few samples for it to differ
+    from the slowest, as given by _PERCENTILE_SAMPLES.
+
+    Each sample is the mean time of enough solves in a row to take at
+    least _MIN_SAMPLE seconds, so quick cases are not lost in the noise.
+
+    @type puzzle: Puzzle
+    @type solver: (Puzzle) -> PuzzleNode | None
+    @type repeat: int
+    @type warmup: int
+    @rtype: dict[str, object]
+    """
+    loops = 1
+    for _ in range(max(warmup, 1)):
+        start = perf_counter()
+        solution = solver(puzzle)
+        elapsed = perf_counter() - start
+        loops = max(loops, min(int(_MIN_SAMPLE / max(elapsed, 1e-6)) + 1,
+                               1000))
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(loops):
+            solution = solver(puzzle)
+        times.append((perf_counter() - start) / loops)
+    result = {"solved": solution is not None, "loops": loops,
+              "p50": percentile(times, 50), "min": min(times),
+              "max": max(times), "nodes": None, "nodes_per_second": None}
+    for p, samples in _PERCENTILE_SAMPLES.items():
+        result["p{}".format(p)] = (percentile(times, p)
+                                   if repeat >= samples else None)
+    if solver in _COUNTING:
+        stats = SearchStats()
+        solver(puzzle, stats=stats)
+        result["nodes"] = stats.nodes_expanded
+        result["nodes_per_second"] = stats.nodes_expanded / result["p50"]
+    # traced separately, since tracing slows the search severalfold
+    tracemalloc.start()
+    try:
+        solver(puzzle)
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run(repeat=_REPEAT, warmup=1, only=""):
+    """
+    Return the results of running every case of the corpus whose name
+    starts with only, as a dict ready to be saved as JSON.
+
+    @type repeat: int
+    @type warmup: int
+    @type only: str
+    @rtype: dict[str, object]
+    """
+    cases = {}
+    for name, puzzle, solver in corpus():
+        if name.startswith(only):
+            cases[name] = run_case(puzzle, solver, repeat, warmup)
+            print(format_case(name, cases[name]))
+    return {"python": platform.python_version(), "repeat": repeat,
+            "warmup": warmup, "cases": cases}
+
+
+def format_case(name, result):
+    """
+    Return a one line summary of the result of the case called name.
+
+    @type name: str
+    @type result: dict[str, object]
+    @rtype: str
+
+    >>> format_case("x", {"p50": 0.25, "p90": 0.5, "nodes": None,
+    ...                   "nodes_per_second": None,
+    ...                   "peak_bytes": 2048}).split()
+    ['x', 'p50', '0.2500s', 'p90', '0.5000s', '-', 'nodes/s', '2', 'KiB']
+    >>> format_case("x", {"p50": 0.25, "p90": None, "nodes": 10,
+    ...                   "nodes_per_second": 40.0,
+    ...                   "peak_bytes": 2048}).split()
+    ['x', 'p50', '0.2500s', 'p90', '-', '40', 'nodes/s', '2', 'KiB']
+    """
+    if result["nodes_per_second"] is None:
+        rate = "-"
+    else:
+        rate = "{:.0f}".format(result["nodes_per_second"])
+    if result["p90"] is None:
+        p90 = "-"
+    else:
+        p90 = "{:.4f}s".format(result["p90"])
+    return "{:32} p50 {:8.4f}s  p90 {:>9} {:>12} nodes/s {:>6} KiB".format(
+        name, result["p50"], p90, rate, result["peak_bytes"] // 1024)
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Return a line comparing each case in both results and baseline, and
+    whether any case regressed: its median time grew by more than the
+    fraction tolerance, or it searched a different number of nodes,
+    which means a puzzle or solver now behaves differently.
+
+    @type results: dict[str, object]
+    @type baseline: dict[str, object]
+    @type tolerance: float
+    @rtype: (list[str], bool)
+
+    >>> old = {"cases": {"a": {"p50": 1.0, "nodes": 10},
+    ...                  "b": {"p50": 1.0, "nodes": None}}}
+    >>> new = {"cases": {"a": {"p50": 0.5, "nodes": 10},
+    ...                  "b": {"p50": 1.5, "nodes": None}}}
+    >>> lines, regressed = compare(new, old)
+    >>> for line in lines:
+    ...     print(line)
+    a                                 0.50x  faster
+    b                                 1.50x  SLOWER
+    >>> regressed
+    True
+    """
+    lines, regressed = [], False
+    for name in sorted(results["cases"]):
+        if name not in baseline["cases"]:
+            continue
+        new, old = results["cases"][name], baseline["cases"][name]
+        ratio = new["p50"] / old["p50"]
+        notes = []
+        if ratio > 1 + tolerance:
+            notes.append("SLOWER")
+        elif ratio < 1 - tolerance:
+            notes.append("faster")
+        if new["nodes"] != old["nodes"]:
+            notes.append("NODES {} -> {}".format(old["nodes"], new["nodes"]))
+        if notes and notes != ["faster"]:
+            regressed = True
+        lines.append("{:32} {:5.2f}x  {}".format(name, ratio,
+                                                 " ".join(notes)).rstrip())
+    return lines, regressed
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Benchmark the solvers.")
+    parser.add_argument("--repeat", type=int, default=_REPEAT,
+                        help="timed runs of each case; p90 is reported "
+                        "from 10 and p99 from 100")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="untimed runs of each case before timing")
+    parser.add_argument("--only", default="",
+                        help="run only the cases starting with this")
+    parser.add_argument("--json", help="file to save the results in")
+    parser.add_argument("--baseline",
+                        help="results saved earlier to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="fraction a median may grow by unflagged")
+    args = parser.parse_args()
+    results = run(args.repeat, args.warmup, args.only)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            lines, regressed = compare(results, json.load(f), args.tolerance)
+        print("\ncompared with {}:".format(args.baseline))
+        for line in lines:
+            print(line)
+        sys.exit(1 if regressed else 0)
@@ -0,0 +1,334 @@
+"""
+Breadth first search of state spaces too large to keep in memory, with
+each layer of the search kept on disk as a sorted file of packed
+configurations
+"""
+import heapq
+import json
+import os
+
+# the name of the file recording how far a search in a directory has got
+_CHECKPOINT = "checkpoint.json"
+# how many records to read from a file at once
+_CHUNK = 4096
+
+
+def _layer_path(directory, depth):
+    """
+    Return the path of the file holding the configurations at distance
+    depth from the start of the search in directory.
+
+    @type directory: str
+    @type depth: int
+    @rtype: str
+    """
+    return os.path.join(directory, "layer-{:04d}.bin".format(depth))
+
+
+def _seen_path(directory, depth):
+    """
+    Return the path of the file holding every configuration at distance
+    at most depth from the start of the search in directory.
+
+    @type directory: str
+    @type depth: int
+    @rtype: str
+    """
+    return os.path.join(directory, "seen-{:04d}.bin".format(depth))
+
+
+def _records(path, size):
+    """
+    Generate the records of size bytes each in the file at path, in
+    order.
+
+    @type path: str
+    @type size: int
+    @rtype: generator[bytes]
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(size * _CHUNK)
+            if not chunk:
+                return
+            for i in range(0, len(chunk), size):
+                yield chunk[i:i + size]
+
+
+def _write(path, records):
+    """
+    Write records to a file at path, replacing it only once every record
+    is written so that a crash never leaves it half written, and return
+    how many records there were.
+
+    @type path: str
+    @type records: iterable[bytes]
+    @rtype: int
+    """
+    count = 0
+    with open(path + ".part", "wb") as f:
+        for record in records:
+            f.write(record)
+            count += 1
+    os.replace(path + ".part", path)
+    return count
+
+
+def _unique(records):
+    """
+    Generate the sorted records, dropping repeats.
+
+    @type records: iterable[bytes]
+    @rtype: generator[bytes]
+
+    >>> list(_unique([b"a", b"a", b"b", b"c", b"c"]))
+    [b'a', b'b', b'c']
+    """
+    previous = None
+    for record in records:
+        if record != previous:
+            yield record
+            previous = record
+
+
+def _difference(records, removed):
+    """
+    Generate the sorted records that are not among the sorted removed.
+
+    @type records: iterable[bytes]
+    @type removed: iterable[bytes]
+    @rtype: generator[bytes]
+
+    >>> list(_difference([b"a", b"b", b"d"], [b"b", b"c"]))
+    [b'a', b'd']
+    """
+    removed = iter(removed)
+    other = next(removed, None)
+    for record in records:
+        while other is not None and other < record:
+            other = next(removed, None)
+        if record != other:
+            yield record
+
+
+def _clean(directory, depth):
+    """
+    Remove the files in directory left by a search that stopped while
+    working out the layer after depth.
+
+    @type directory: str
+    @type depth: int
+    @rtype: None
+    """
+    keep = {os.path.basename(_layer_path(directory, d))
+            for d in range(depth + 1)}
+    keep.add(os.path.basename(_seen_path(directory, depth)))
+    keep.add(_CHECKPOINT)
+    for name in os.listdir(directory):
+        if (name.startswith(("layer-", "seen-", "run-")) or
+                name.endswith(".part")) and name not in keep:
+            os.remove(os.path.join(directory, name))
+
+
+def _identity(puzzle):
+    """
+    Return what tells the search of external_bfs from puzzle apart from
+    any other: the configurations it works among, how they are packed,
+    where it starts and how many layers each layer is checked against.
+
+    @type puzzle: Puzzle
+    @rtype: dict[str, object]
+    """
+    start = puzzle.to_bytes()
+    return {"space": puzzle.space_key(), "size": len(start),
+            "start": start.hex(), "window": puzzle.layer_window()}
+
+
+def _save_checkpoint(directory, identity, counts):
+    """
+    Record in directory that the search with identity, from _identity,
+    has written layers with counts configurations.
+
+    @type directory: str
+    @type identity: dict[str, object]
+    @type counts: list[int]
+    @rtype: None
+    """
+    path = os.path.join(directory, _CHECKPOINT)
+    with open(path + ".part", "w") as f:
+        json.dump(dict(identity, counts=counts), f)
+    os.replace(path + ".part", path)
+
+
+def external_bfs(puzzle, directory, run_size=1 << 20, resume=True):
+    """
+    Return the number of configurations at each distance from puzzle,
+    searching breadth first with the configurations kept in files in
+    directory rather than in memory. Configurations that fail fast are
+    not counted or searched.
+
+    The configurations at distance d are left sorted in directory as
+    layer-dddd.bin, packed by to_bytes one after another; read_layer
+    reads them back. Each layer is made by writing the extensions of the
+    one before to sorted files of at most run_size configurations, then
+    merging those files while dropping repeats and every configuration
+    of an earlier layer. Only one configuration per file being merged is
+    in memory at a time.
+
+    Only the layers that puzzle.layer_window says may hold extensions
+    are checked: the last two when every move can be undone, none when
+    no configuration can be reached again. Otherwise every configuration
+    seen so far is checked, merged in turn into a file of them all, so
+    that each layer reads and writes the whole search so far.
+
+    A checkpoint is written once each layer is complete, so if resume
+    is True a search stopped part way continues from its last complete
+    layer when called again with the same puzzle and directory. Any
+    other search in directory, including one from another puzzle whose
+    start packs into the same bytes, is discarded.
+
+    puzzle must implement to_bytes, from_bytes and space_key, with every
+    configuration packed into the same number of bytes.
+
+    @type puzzle: Puzzle
+    @type directory: str
+    @type run_size: int
+    @type resume: bool
+    @rtype: list[int]
+
+    >>> import tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     counts = external_bfs(MNPuzzle(target_grid, target_grid),
+    ...                           directory, 16)
+    >>> counts[:8], sum(counts), len(counts)
+    ([1, 2, 3, 5, 6, 7, 10, 12], 360, 22)
+
+    A search from another puzzle whose start packs into the same bytes
+    is not resumed.
+
+    >>> other_grid = (("1", "*", "2"), ("3", "4", "5"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     counts = external_bfs(MNPuzzle(target_grid, target_grid),
+    ...                           directory, 16)
+    ...     counts = external_bfs(MNPuzzle(other_grid, other_grid),
+    ...                           directory, 16)
+    >>> counts[:8], sum(counts), len(counts)
+    ([1, 3, 4, 4, 6, 10, 10, 10], 360, 22)
+    """
+    assert run_size > 0
+    os.makedirs(directory, exist_ok=True)
+    identity = _identity(puzzle)
+    size, window = identity["size"], identity["window"]
+    counts = None
+    path = os.path.join(directory, _CHECKPOINT)
+    if resume and os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if all([checkpoint.get(name) == value
+                for name, value in identity.items()]):
+            counts = checkpoint["counts"]
+    if counts is None:
+        _clean(directory, -1)
+        counts = [_write(_layer_path(directory, 0),
+                         [] if puzzle.fail_fast() else [puzzle.to_bytes()])]
+        if window is None:
+            _write(_seen_path(directory, 0),
+                   _records(_layer_path(directory, 0), size))
+        _save_checkpoint(directory, identity, counts)
+    _clean(directory, len(counts) - 1)
+    while counts[-1] > 0:
+        depth = len(counts) - 1
+        # write the extensions of the last layer to sorted runs
+        runs, run = [], []
+        for record in _records(_layer_path(directory, depth), size):
+            for extension in puzzle.from_bytes(record).extensions():
+                if not extension.fail_fast():
+                    run.append(extension.to_bytes())
+            if len(run) >= run_size:
+                runs.append(_write_run(directory, len(runs), run))
+                run = []
+        if run:
+            runs.append(_write_run(directory, len(runs), run))
+        # merge the runs into the next layer, leaving out those seen
+        seen = _seen_path(directory, depth)
+        if window is None:
+            removed = _records(seen, size)
+        else:
+            removed = heapq.merge(*[
+                _records(_layer_path(directory, d), size)
+                for d in range(max(depth - window + 1, 0), depth + 1)])
+        layer = _layer_path(directory, depth + 1)
+        count = _write(layer, _difference(
+            _unique(heapq.merge(*[_records(run, size) for run in runs])),
+            removed))
+        if window is None:
+            _write(_seen_path(directory, depth + 1), heapq.merge(
+                _records(seen, size), _records(layer, size)))
+        counts.append(count)
+        _save_checkpoint(directory, identity, counts)
+        _clean(directory, depth + 1)
+    return counts[:-1]
+
+
+def _write_run(directory, index, run):
+    """
+    Write the configurations of run, sorted and without repeats, to run
+    file index in directory, and return its path.
+
+    @type directory: str
+    @type index: int
+    @type run: list[bytes]
+    @rtype: str
+    """
+    run.sort()
+    path = os.path.join(directory, "run-{:04d}.bin".format(index))
+    _write(path, _unique(run))
+    return path
+
+
+def read_layer(puzzle, directory, depth):
+    """
+    Generate each configuration at distance depth from puzzle, as found
+    by external_bfs(puzzle, directory), in the order of its to_bytes.
+
+    @type puzzle: Puzzle
+    @type directory: str
+    @type depth: int
+    @rtype: generator[Puzzle]
+
+    >>> import tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2"), ("3", "*"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     counts = external_bfs(MNPuzzle(target_grid, target_grid),
+    ...                           directory)
+    ...     for p in read_layer(MNPuzzle(target_grid, target_grid),
+    ...                         directory, 1):
+    ...         print(p)
+    12
+    *3
+    1*
+    32
+    """
+    size = len(puzzle.to_bytes())
+    for record in _records(_layer_path(directory, depth), size):
+        yield puzzle.from_bytes(record)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    import tempfile
+    from time import time
+    from mn_puzzle import MNPuzzle
+    target_grid = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+    with tempfile.TemporaryDirectory() as directory:
+        start = time()
+        counts = external_bfs(MNPuzzle(target_grid, target_grid), directory,
+                              1 << 14)
+        end = time()
+    print("found all {} 3x3 configurations, at most {} moves from the "
+          "goal, on disk in {} seconds".format(sum(counts), len(counts) - 1,
+                                               end - start))
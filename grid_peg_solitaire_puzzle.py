@@ -1,5 +1,357 @@
 from puzzle import Puzzle
 
+# translate a board to a binary numeral with a 1 for each peg
+_PEG_BITS = str.maketrans({"*": "1", ".": "0", "#": "0"})
+# translate a board to a binary numeral with a 1 for each unused cell
+_HOLE_BITS = str.maketrans({"*": "0", ".": "0", "#": "1"})
+# the jumps possible on each board shape, keyed by its height, width and
+# unused cells, shared by every GridPegSolitairePuzzle of that shape
+_move_tables = {}
+# the cell classes and pagoda weights of each board shape, keyed likewise
+_geometry_tables = {}
+# whether boards of at most _ENDGAME pegs can be reduced to a single peg,
+# one table per board shape keyed on canonical keys
+_endgame_tables = {}
+_ENDGAME = 6
+# the largest number of boards remembered per table of _endgame_tables
+_ENDGAME_LIMIT = 1 << 20
+# the weight of a peg one cell further from a target cell than another,
+# chosen so that no jump increases the weight of a board
+_SIGMA = (5 ** (1 / 2) - 1) / 2
+
+
+def _moves(height, width, holes):
+    """
+    Return, for each bit of a height x width board whose unused cells
+    are the bits of holes, the jumps of a peg on that bit's cell, as
+    (cells, pegs) pairs: cells has the bits of the jumping peg, the peg
+    jumped over and the empty landing cell, and pegs has the bits of the
+    first two.
+
+    Cell (x, y) is bit height * width - 1 - (y * width + x), so the first
+    cell in row-major order is the most significant. The jumps of each
+    peg are listed in the order extensions produces them: landing to the
+    left, right, top and bottom.
+
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: list[list[(int, int)]]
+
+    >>> [[(bin(cells), bin(pegs)) for cells, pegs in jumps]
+    ...  for jumps in _moves(1, 3, 0)]
+    [[('0b111', '0b11')], [], [('0b111', '0b110')]]
+    """
+    moves = _move_tables.get((height, width, holes))
+    if moves is None:
+        last = height * width - 1
+        moves = [[] for _ in range(last + 1)]
+
+        def bit(x, y):
+            return 1 << (last - (y * width + x))
+        for y in range(height):
+            for x in range(width):
+                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    if (0 <= x + 2 * dx < width and
+                            0 <= y + 2 * dy < height):
+                        pegs = bit(x, y) | bit(x + dx, y + dy)
+                        cells = pegs | bit(x + 2 * dx, y + 2 * dy)
+                        if not cells & holes:
+                            moves[last - (y * width + x)].append(
+                                (cells, pegs))
+        _move_tables[(height, width, holes)] = moves
+    return moves
+
+
+# the symmetries of each board shape, keyed like _move_tables
+_symmetry_tables = {}
+
+
+def _symmetries(height, width, holes):
+    """
+    Return the number of reflections and rotations, other than the
+    identity, that map a height x width board whose unused cells are the
+    bits of holes onto itself, and tables for applying them all at once.
+
+    There is a table for each byte of a board's pegs from the least
+    significant up, mapping the value of that byte to the pegs it
+    becomes under every symmetry, each in its own height * width bit
+    field of one int. OR-ing one lookup per byte gives every image of a
+    board in a handful of operations.
+
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: (int, list[list[int]])
+
+    >>> _symmetries(5, 5, 0)[0], _symmetries(4, 5, 0)[0]
+    (7, 3)
+    >>> _symmetries(2, 2, 0b1000)[0]
+    1
+    """
+    symmetries = _symmetry_tables.get((height, width, holes))
+    if symmetries is None:
+        size = height * width
+        maps = [lambda x, y: (width - 1 - x, y),
+                lambda x, y: (x, height - 1 - y),
+                lambda x, y: (width - 1 - x, height - 1 - y)]
+        if height == width:
+            maps += [lambda x, y: (y, x),
+                     lambda x, y: (width - 1 - y, x),
+                     lambda x, y: (y, width - 1 - x),
+                     lambda x, y: (width - 1 - y, width - 1 - x)]
+        # images[b] has the bits that bit b moves to under each symmetry
+        images, count = [0] * size, 0
+        for f in maps:
+            image = []
+            for b in range(size):
+                x, y = f((size - 1 - b) % width, (size - 1 - b) // width)
+                image.append(size - 1 - (y * width + x))
+            if sum([1 << image[b] for b in range(size)
+                    if holes >> b & 1]) == holes:
+                for b in range(size):
+                    images[b] |= 1 << (image[b] + count * size)
+                count += 1
+        tables = []
+        for low in range(0, size, 8):
+            table = [0] * 256
+            for value in range(1, 256):
+                # add the images of the lowest bit of value to those of
+                # the rest of its bits
+                lowest = value & -value
+                b = low + lowest.bit_length() - 1
+                table[value] = table[value ^ lowest] | (
+                    images[b] if b < size else 0)
+            tables.append(table)
+        symmetries = _symmetry_tables[(height, width, holes)] = (count,
+                                                                 tables)
+    return symmetries
+
+
+def _canonical(pegs, height, width, holes):
+    """
+    Return the smallest of pegs and its images under the symmetries of a
+    height x width board whose unused cells are the bits of holes.
+
+    @type pegs: int
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: int
+    """
+    size = height * width
+    count, tables = _symmetries(height, width, holes)
+    images, rest, key = 0, pegs, pegs
+    for table in tables:
+        images |= table[rest & 255]
+        rest >>= 8
+    field = (1 << size) - 1
+    for _ in range(count):
+        if images & field < key:
+            key = images & field
+        images >>= size
+    return key
+
+
+def _geometry(height, width, holes):
+    """
+    Return tables describing a height x width board whose unused cells
+    are the bits of holes, laid out as for _moves:
+
+    - the bits of the cells (x, y) with (x + y) % 3 == k for each k, then
+      those with (x - y) % 3 == k for each k
+    - whether a final peg may be left on a cell of both classes, as a
+      table indexed by the two values of k
+    - masks of the cells that have a cell to their left and to their
+      right, and of every cell
+    - for each bit, the bits of its neighbours that are in use
+    - for each bit, the pegs needed by each jump that lands next to that
+      bit's cell without jumping over it
+    - for each bit, the weight of the pegs on the board from that bit's
+      cell, as a table for each byte of the board from the least
+      significant up, mapping the value of that byte to the total of
+      _SIGMA to the power of the distance of each of its pegs
+
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: (list[int], list[list[bool]], int, int, int, list[list[int]],
+             list[list[int]], list[list[list[float]]])
+    """
+    geometry = _geometry_tables.get((height, width, holes))
+    if geometry is None:
+        size = height * width
+        classes = [0] * 6
+        finals = [[False] * 3 for _ in range(3)]
+        has_left = has_right = 0
+        neighbours, weights = [], []
+        for b in range(size):
+            x, y = (size - 1 - b) % width, (size - 1 - b) // width
+            classes[(x + y) % 3] |= 1 << b
+            classes[3 + (x - y) % 3] |= 1 << b
+            if not holes >> b & 1:
+                finals[(x + y) % 3][(x - y) % 3] = True
+            if x > 0:
+                has_left |= 1 << b
+            if x < width - 1:
+                has_right |= 1 << b
+            near = []
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                if 0 <= x + dx < width and 0 <= y + dy < height:
+                    other = b - (dy * width + dx)
+                    if not holes >> other & 1:
+                        near.append(other)
+            neighbours.append(near)
+            weight = [_SIGMA ** (abs(x - (size - 1 - a) % width) +
+                                 abs(y - (size - 1 - a) // width))
+                      for a in range(size)] + [0] * 7
+            tables = []
+            for low in range(0, size, 8):
+                table = [0] * 256
+                for value in range(1, 256):
+                    lowest = value & -value
+                    table[value] = (table[value ^ lowest] +
+                                    weight[low + lowest.bit_length() - 1])
+                tables.append(table)
+            weights.append(tables)
+        moves = _moves(height, width, holes)
+        rescues = [[] for _ in range(size)]
+        for b in range(size):
+            for jumps in moves:
+                for cells, jumping in jumps:
+                    landing = cells ^ jumping
+                    if (not jumping >> b & 1 and
+                            landing.bit_length() - 1 in neighbours[b]):
+                        rescues[b].append(jumping)
+        geometry = _geometry_tables[(height, width, holes)] = (
+            classes, finals, has_left, has_right, (1 << size) - 1,
+            neighbours, rescues, weights)
+    return geometry
+
+
+def _divided(pegs, height, width, holes):
+    """
+    Return whether the position classes of pegs on a height x width board
+    whose unused cells are the bits of holes rule out ever reaching a
+    single peg.
+
+    Every jump involves one cell of each class of (x + y) % 3, and of
+    (x - y) % 3, so it changes the parity of the number of pegs in every
+    class at once. A single peg leaves one class of each kind odd and the
+    others even, so the class of each kind whose parity differs from the
+    other two must be the final peg's, and there must be such a class.
+
+    @type pegs: int
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: bool
+
+    >>> _divided(0b11000, 1, 5, 0), _divided(0b110110, 2, 3, 0)
+    (False, True)
+    """
+    classes, finals = _geometry(height, width, holes)[:2]
+    odd = []
+    for kind in (0, 3):
+        parities = [bin(pegs & classes[kind + k]).count("1") % 2
+                    for k in range(3)]
+        if parities[0] == parities[1] == parities[2]:
+            return True
+        # the class of this kind differing from the other two
+        odd.append([k for k in range(3)
+                    if parities.count(parities[k]) == 1][0])
+    return not finals[odd[0]][odd[1]]
+
+
+def _stranded(pegs, height, width, holes):
+    """
+    Return whether some peg of pegs, on a height x width board whose
+    unused cells are the bits of holes, can never be moved or jumped.
+
+    Such a peg has no peg next to it, and the other pegs can never bring
+    one there: weighting a peg by _SIGMA to the power of its distance
+    from a cell, no jump increases the total weight of the board, so a
+    peg can only ever reach a cell if the other pegs weigh at least 1.
+
+    @type pegs: int
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: bool
+
+    >>> _stranded(0b1000011, 1, 7, 0), _stranded(0b1011000, 1, 7, 0)
+    (True, False)
+    """
+    (_, _, has_left, has_right, full,
+     neighbours, rescues, weights) = _geometry(height, width, holes)
+    # pegs with a peg to their left, right, above or below
+    crowded = (((pegs >> 1) & has_left) | ((pegs << 1) & has_right) |
+               (pegs >> width) | ((pegs << width) & full))
+    lonely = pegs & ~crowded
+    if not lonely or pegs & (pegs - 1) == 0:
+        return False
+    while lonely:
+        b = (lonely & -lonely).bit_length() - 1
+        lonely &= lonely - 1
+        for jumping in rescues[b]:
+            if pegs & jumping == jumping:
+                # a peg can be brought next to it straight away
+                break
+        else:
+            jumping = None
+        if jumping is not None:
+            continue
+        for cell in neighbours[b]:
+            total, rest = 0, pegs ^ (1 << b)
+            for table in weights[cell]:
+                total += table[rest & 255]
+                rest >>= 8
+            # allow for rounding in favour of the peg being reachable
+            if total > 1 - 1e-9:
+                break
+        else:
+            return True
+    return False
+
+
+def _endgame(pegs, height, width, holes):
+    """
+    Return whether pegs, on a height x width board whose unused cells are
+    the bits of holes, can be reduced to a single peg, searching every
+    jump and remembering the answer for each board up to symmetry.
+
+    Only use this for boards with few pegs.
+
+    @type pegs: int
+    @type height: int
+    @type width: int
+    @type holes: int
+    @rtype: bool
+
+    >>> _endgame(0b0110, 1, 4, 0), _endgame(0b1001, 1, 4, 0)
+    (True, False)
+    """
+    if pegs & (pegs - 1) == 0:
+        return pegs != 0
+    table = _endgame_tables.setdefault((height, width, holes), {})
+    key = _canonical(pegs, height, width, holes)
+    solvable = table.get(key)
+    if solvable is None:
+        solvable, moves, rest = False, _moves(height, width, holes), pegs
+        while rest and not solvable:
+            b = rest.bit_length() - 1
+            rest ^= 1 << b
+            for cells, jumping in moves[b]:
+                if (pegs & cells == jumping and
+                        not _stranded(pegs ^ cells, height, width, holes) and
+                        _endgame(pegs ^ cells, height, width, holes)):
+                    solvable = True
+                    break
+        if len(table) >= _ENDGAME_LIMIT:
+            table.clear()
+        table[key] = solvable
+    return solvable
+
 
 class GridPegSolitairePuzzle(Puzzle):
     """
@@ -22,7 +374,17 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([len(x) == len(marker[0]) for x in marker[1:]])
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
-        self._marker, self._marker_set = marker, marker_set
+        self._height, self._width = len(marker), len(marker[0])
+        cells = "".join(["".join(row) for row in marker])
+        # one bit per cell, the first cell in row-major order being the
+        # most significant, for the pegs and for the unused cells
+        self._pegs = int(cells.translate(_PEG_BITS), 2)
+        self._holes = int(cells.translate(_HOLE_BITS), 2)
+        self._marker_set = marker_set
+        # no jump changes whether the position classes allow one peg to
+        # be left, so this is shared by every extension of self
+        self._divided = _divided(self._pegs, self._height, self._width,
+                                 self._holes)
 
     def __eq__(self, other):
         """
@@ -49,7 +411,10 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> gpsp1 == 1234
         False
         """
-        return (type(other) == type(self) and self._marker == other._marker and
+        return (type(other) == type(self) and
+                self._pegs == other._pegs and self._holes == other._holes and
+                self._height == other._height and
+                self._width == other._width and
                 self._marker_set == other._marker_set)
 
     def __str__(self):
@@ -73,12 +438,120 @@ class GridPegSolitairePuzzle(Puzzle):
         **.**
         *****
         """
-        puzzle_str = ""
-        for row in self._marker:
-            for column in row:
-                puzzle_str += column
-            puzzle_str += "\n"
-        return puzzle_str.rstrip("\n")
+        size = self._height * self._width
+        cells = []
+        for i in range(size - 1, -1, -1):
+            if self._pegs >> i & 1:
+                cells.append("*")
+            elif self._holes >> i & 1:
+                cells.append("#")
+            else:
+                cells.append(".")
+        return "\n".join(["".join(cells[y:y + self._width])
+                          for y in range(0, size, self._width)])
+
+    def __hash__(self):
+        """
+        Return a hash of GridPegSolitairePuzzle self consistent with __eq__.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return the pegs of GridPegSolitairePuzzle self packed into an int,
+        one bit per cell in row-major order.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid = [["*", "*", "."], ["#", "*", "."]]
+        >>> bin(GridPegSolitairePuzzle(grid, {"*", ".", "#"}).state_key())
+        '0b110010'
+        """
+        return self._pegs
+
+    def to_bytes(self):
+        """
+        Return the pegs of GridPegSolitairePuzzle self packed into bytes,
+        one bit per cell in row-major order.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bytes
+
+        >>> grid = [["*", "*", "."], ["#", "*", "."]]
+        >>> puzzle = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> puzzle.to_bytes()
+        b'2'
+        >>> puzzle.from_bytes(b"\\x01").state_key()
+        1
+        """
+        return self._pegs.to_bytes((self._height * self._width + 7) // 8,
+                                   "big")
+
+    def from_bytes(self, data):
+        """
+        Return the GridPegSolitairePuzzle packed into data by to_bytes,
+        with the board of GridPegSolitairePuzzle self.
+
+        @type self: GridPegSolitairePuzzle
+        @type data: bytes
+        @rtype: GridPegSolitairePuzzle
+        """
+        puzzle = self._jump(int.from_bytes(data, "big"))
+        puzzle._divided = _divided(puzzle._pegs, self._height, self._width,
+                                   self._holes)
+        return puzzle
+
+    def space_key(self):
+        """
+        Return a string identifying the board of GridPegSolitairePuzzle
+        self.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: str
+
+        >>> grid = [["*", "*", "."], ["#", "*", "."]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).space_key()
+        'GridPegSolitairePuzzle 2x3 holes 4'
+        """
+        return "GridPegSolitairePuzzle {}x{} holes {}".format(
+            self._height, self._width, self._holes)
+
+    def layer_window(self):
+        """
+        Return 0, since every jump of GridPegSolitairePuzzle self takes a
+        peg, so each layer holds configurations with one fewer peg than
+        the layer before.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+        """
+        return 0
+
+    def canonical_key(self):
+        """
+        Return the smallest state_key among GridPegSolitairePuzzle self
+        and its reflections and rotations that fit the same board.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid1 = [["*", "*", "."], [".", ".", "."], [".", ".", "."]]
+        >>> grid2 = [[".", ".", "."], [".", ".", "*"], [".", ".", "*"]]
+        >>> gpsp1 = GridPegSolitairePuzzle(grid1, {"*", ".", "#"})
+        >>> gpsp2 = GridPegSolitairePuzzle(grid2, {"*", ".", "#"})
+        >>> gpsp1.canonical_key() == gpsp2.canonical_key()
+        True
+        >>> grid3 = [["*", ".", "."], [".", "*", "."], [".", ".", "."]]
+        >>> gpsp3 = GridPegSolitairePuzzle(grid3, {"*", ".", "#"})
+        >>> gpsp1.canonical_key() == gpsp3.canonical_key()
+        False
+        """
+        return _canonical(self._pegs, self._height, self._width,
+                          self._holes)
 
     def extensions(self):
         """
@@ -143,69 +616,63 @@ class GridPegSolitairePuzzle(Puzzle):
         ***..
         <BLANKLINE>
         """
-        # helper
-        def create_grid(grid_, x_, y_, new_value):
-            """
-            Return a new grid with a new_value in position x, y without
-            modifying grid
-
-            @type grid_: list[list[str]]
-            @type x_: int
-            @type y_: int
-            @type new_value: str
-            @rtype: list[list[str]]
-            """
-            new_grid = grid_[:y_] + [grid_[y_][:x_]]
-            new_grid[y_].extend([new_value])
-            new_grid[y_].extend(grid_[y_][x_ + 1:])
-            new_grid += grid_[y_ + 1:]
-            return new_grid
-
+        pegs = rest = self._pegs
+        moves = _moves(self._height, self._width, self._holes)
         ext = []
-        for y in range(len(self._marker)):
-            if "*" in self._marker[y]:
-                for x in range(len(self._marker[y])):
-                    if self._marker[y][x] == "*":
-                        # Check if a jump from the left is possible
-                        # If it is add it to <list> ext
-                        if x >= 2 and self._marker[y][x - 1] == "*" and \
-                                self._marker[y][x - 2] == ".":
-                            new_grid = create_grid(self._marker, x, y, ".")
-                            new_grid = create_grid(new_grid, x - 1, y, ".")
-                            new_grid = create_grid(new_grid, x - 2, y, "*")
-                            ext.append(GridPegSolitairePuzzle(new_grid,
-                                                              self._marker_set))
-                        # Check if a jump from the right is possible
-                        # If it is add it to <list> ext
-                        if x <= len(self._marker[y]) - 3 and \
-                            self._marker[y][x + 1]\
-                                == "*" and self._marker[y][x + 2] == ".":
-                            new_grid = create_grid(self._marker, x, y, ".")
-                            new_grid = create_grid(new_grid, x + 1, y, ".")
-                            new_grid = create_grid(new_grid, x + 2, y, "*")
-                            ext.append(GridPegSolitairePuzzle(new_grid,
-                                                              self._marker_set))
-                        # Check if a jump from the top is possible
-                        # If it is add it to <list> ext
-                        if y >= 2 and self._marker[y - 1][x] == "*" and \
-                                self._marker[y - 2][x] == ".":
-                            new_grid = create_grid(self._marker, x, y, ".")
-                            new_grid = create_grid(new_grid, x, y - 1, ".")
-                            new_grid = create_grid(new_grid, x, y - 2, "*")
-                            ext.append(GridPegSolitairePuzzle(new_grid,
-                                                              self._marker_set))
-                        # Check if a jump from the bottom is possible
-                        # If it is add it to <list> ext
-                        if y <= len(self._marker) - 3 and \
-                            self._marker[y + 1][x] ==\
-                                "*" and self._marker[y + 2][x] == ".":
-                            new_grid = create_grid(self._marker, x, y, ".")
-                            new_grid = create_grid(new_grid, x, y + 1, ".")
-                            new_grid = create_grid(new_grid, x, y + 2, "*")
-                            ext.append(GridPegSolitairePuzzle(new_grid,
-                                                              self._marker_set))
+        # visit the pegs from the most significant bit, in row-major order
+        while rest:
+            b = rest.bit_length() - 1
+            rest ^= 1 << b
+            for cells, jumping in moves[b]:
+                # the two pegs are present and the landing cell is empty
+                if pegs & cells == jumping:
+                    ext.append(self._jump(pegs ^ cells))
         return ext
 
+    def _jump(self, pegs):
+        """
+        Return a GridPegSolitairePuzzle with the board of
+        GridPegSolitairePuzzle self but pegs pegs.
+
+        @type self: GridPegSolitairePuzzle
+        @type pegs: int
+        @rtype: GridPegSolitairePuzzle
+        """
+        child = GridPegSolitairePuzzle.__new__(GridPegSolitairePuzzle)
+        child._height, child._width = self._height, self._width
+        child._pegs, child._holes = pegs, self._holes
+        child._marker_set = self._marker_set
+        child._divided = self._divided
+        return child
+
+    def fail_fast(self):
+        """
+        Return True if GridPegSolitairePuzzle self can never be reduced to
+        a single peg: its position classes rule it out, a peg can never
+        be moved or jumped again, or it has at most _ENDGAME pegs and no
+        sequence of jumps leaves just one.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        True
+        >>> grid = [["*", "*", ".", ".", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        True
+        >>> grid = [["*", "*", ".", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        False
+        """
+        pegs = self._pegs
+        if self._divided or pegs == 0:
+            return True
+        if _stranded(pegs, self._height, self._width, self._holes):
+            return True
+        return (bin(pegs).count("1") <= _ENDGAME and
+                not _endgame(pegs, self._height, self._width, self._holes))
+
     def is_solved(self):
         """
         Return  GridPegSolitairePuzzle self is solved.
@@ -230,12 +697,8 @@ class GridPegSolitairePuzzle(Puzzle):
         True
 
         """
-        counter = 0
-        for y in range(len(self._marker)):
-            for x in range(len(self._marker[y])):
-                if self._marker[y][x] == "*":
-                    counter += 1
-        return counter == 1
+        # exactly one bit is set
+        return self._pegs != 0 and self._pegs & (self._pegs - 1) == 0
 
 if __name__ == "__main__":
     import doctest
@@ -253,3 +716,22 @@ if __name__ == "__main__":
     end = time.time()
     print("Solved 5x5 peg solitaire in {} seconds.".format(end - start))
     print("Using depth-first: \n{}".format(solution))
+    # the English board with its centre empty, and the French board with
+    # the first cell of its third row empty, since the French board
+    # cannot be solved from its centre
+    boards = {"English": ["##***##", "##***##", "*******", "***.***",
+                          "*******", "##***##", "##***##"],
+              "French": ["##***##", "#*****#", ".******", "*******",
+                         "*******", "#*****#", "##***##"]}
+    for name in sorted(boards):
+        gpsp = GridPegSolitairePuzzle([list(row) for row in boards[name]],
+                                      {"*", ".", "#"})
+        start = time.time()
+        solution = depth_first_solve(gpsp)
+        end = time.time()
+        print("Solved 7x7 {} peg solitaire in {} seconds.".format(
+            name, end - start))
+    centre = [list(row) for row in boards["French"]]
+    centre[2][0], centre[3][3] = "*", "."
+    print("7x7 French peg solitaire from its centre fails fast: {}".format(
+        GridPegSolitairePuzzle(centre, {"*", ".", "#"}).fail_fast()))
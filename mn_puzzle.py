@@ -1,11 +1,209 @@
 from puzzle import Puzzle
+from bisect import bisect_left
+
+# map each symbol to a small integer code, with one table per target
+# grid shared by every MNPuzzle working towards that grid
+_symbol_codes = {}
+# the codes of each target grid's own cells, one per target grid
+_goal_boards = {}
+
+
+def _codes(to_grid):
+    """
+    Return the table of symbol codes for target grid to_grid.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: dict[str, int]
+    """
+    try:
+        return _symbol_codes[to_grid]
+    except KeyError:
+        codes = {}
+        for row in to_grid:
+            for symbol in row:
+                codes.setdefault(symbol, len(codes))
+        _symbol_codes[to_grid] = codes
+        return codes
+
+
+def _symbols(to_grid):
+    """
+    Return the symbols coded by the table of _codes(to_grid), indexed by
+    their codes.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: list[str]
+    """
+    # codes are handed out in order, so the table's keys are in code order
+    return list(_codes(to_grid))
+
+
+def _goal_board(to_grid):
+    """
+    Return the board of the MNPuzzle that has reached target grid
+    to_grid, in the form of MNPuzzle.state_key.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: bytes | tuple[int]
+    """
+    try:
+        return _goal_boards[to_grid]
+    except KeyError:
+        codes = _codes(to_grid)
+        board = [codes[symbol] for row in to_grid for symbol in row]
+        board = _goal_boards[to_grid] = (
+            bytes(board) if len(codes) < 256 else tuple(board))
+        return board
+
+
+def linear_conflict(goals):
+    """
+    Return the extra moves forced by tiles in one row or column whose
+    goal positions goals in that line are out of order.
+
+    Every tile outside a longest increasing run must leave the line and
+    come back, which costs two moves more than its Manhattan distance.
+
+    @type goals: list[int]
+    @rtype: int
+    """
+    tails = []
+    for goal in goals:
+        i = bisect_left(tails, goal)
+        if i == len(tails):
+            tails.append(goal)
+        else:
+            tails[i] = goal
+    return 2 * (len(goals) - len(tails))
+
+
+# neighbours of each cell of an n x m grid in row-major order, one
+# table per shape, shared by every MNPuzzle of that shape
+_neighbour_tables = {}
+
+
+def neighbour_table(n, m):
+    """
+    Return, for each cell of an n x m grid in row-major order, the cells
+    the blank can move to from there, in the order MNPuzzle.extensions
+    tries them: above, left, below, right.
+
+    @type n: int
+    @type m: int
+    @rtype: tuple[tuple[int]]
+
+    >>> neighbour_table(2, 3)
+    ((3, 1), (0, 4, 2), (1, 5), (0, 4), (1, 3, 5), (2, 4))
+    """
+    table = _neighbour_tables.get((n, m))
+    if table is None:
+        table = []
+        for cell in range(n * m):
+            r, c = divmod(cell, m)
+            cells = []
+            if r > 0:
+                cells.append(cell - m)
+            if c > 0:
+                cells.append(cell - 1)
+            if r < n - 1:
+                cells.append(cell + m)
+            if c < m - 1:
+                cells.append(cell + 1)
+            table.append(tuple(cells))
+        table = _neighbour_tables[(n, m)] = tuple(table)
+    return table
+
+
+# whether each target grid holds distinct symbols, one of them the blank
+_distinct_grids = {}
+
+
+def _distinct(to_grid):
+    """
+    Return whether target grid to_grid holds a blank and no symbol more
+    than once, so that each tile has a single goal cell.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: bool
+
+    >>> _distinct((("1", "2"), ("3", "*")))
+    True
+    >>> _distinct((("A", "A"), ("B", "*")))
+    False
+    """
+    try:
+        return _distinct_grids[to_grid]
+    except KeyError:
+        target = [symbol for row in to_grid for symbol in row]
+        distinct = _distinct_grids[to_grid] = (
+            len(set(target)) == len(target) and "*" in target)
+        return distinct
+
+
+# symmetries of the board that leave each target grid's blank in place,
+# one table per target grid
+_conjugation_tables = {}
+
+
+def _conjugations(to_grid):
+    """
+    Return the reflections and rotations of the board, other than the
+    identity, that keep the blank's cell in target grid to_grid fixed,
+    each as the list of the cell every cell moves to. Return none if
+    to_grid repeats a symbol.
+
+    Moving every tile to the image of its cell and renumbering it by the
+    image of its goal cell maps to_grid to itself and each configuration
+    to one the same number of moves from to_grid.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: list[list[int]]
+
+    >>> len(_conjugations((("1", "2", "3"), ("4", "*", "5"),
+    ...                    ("6", "7", "8"))))
+    7
+    >>> _conjugations((("1", "2"), ("3", "*")))
+    [[0, 2, 1, 3]]
+    """
+    try:
+        return _conjugation_tables[to_grid]
+    except KeyError:
+        n, m = len(to_grid), len(to_grid[0])
+        target = [symbol for row in to_grid for symbol in row]
+        maps = [lambda r, c: (r, m - 1 - c),
+                lambda r, c: (n - 1 - r, c),
+                lambda r, c: (n - 1 - r, m - 1 - c)]
+        if n == m:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (c, n - 1 - r),
+                     lambda r, c: (n - 1 - c, r),
+                     lambda r, c: (n - 1 - c, n - 1 - r)]
+        conjugations = []
+        if len(set(target)) == n * m and "*" in target:
+            blank = target.index("*")
+            for f in maps:
+                image = []
+                for cell in range(n * m):
+                    r, c = f(cell // m, cell % m)
+                    image.append(r * m + c)
+                if image[blank] == blank:
+                    conjugations.append(image)
+        _conjugation_tables[to_grid] = conjugations
+        return conjugations
 
 
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    The board is stored flat in row-major order, one symbol code from
+    _codes per cell, together with the cell of the blank. Symbols that
+    are not in to_grid are coded after those that are, in the order of
+    _extra.
     """
+    __slots__ = ("n", "m", "to_grid", "_board", "_blank", "_extra",
+                 "_solvable")
 
     def __init__(self, from_grid, to_grid):
         """
@@ -23,7 +221,24 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        # a tuple of tuples, so that it can key the tables above
+        self.to_grid = to_grid = tuple([tuple(row) for row in to_grid])
+        codes = _codes(to_grid)
+        # symbols not in to_grid, coded after those that are by self
+        # alone, so that the table shared by to_grid stays as it made it
+        extra = {}
+        board = [codes[symbol] if symbol in codes else
+                 extra.setdefault(symbol, len(codes) + len(extra))
+                 for row in from_grid for symbol in row]
+        self._extra = tuple(extra)
+        # fall back on a tuple for grids with too many symbols for a byte
+        self._board = (bytes(board) if len(codes) + len(extra) < 256 else
+                       tuple(board))
+        self._blank = self._find_blank(board)
+        # whether the parity of self agrees with that of to_grid, worked
+        # out when first needed; no move changes it, so extensions share
+        # it with self
+        self._solvable = None
 
     def __eq__(self, other):
         """
@@ -45,10 +260,29 @@ class MNPuzzle(Puzzle):
         assert type(other) is MNPuzzle,\
             "You're not comparing to an MNPuzzle!"
         if self.to_grid == other.to_grid \
-                and self.from_grid == other.from_grid:
+                and self._board == other._board \
+                and self._extra == other._extra:
             return True
         return False
 
+    @property
+    def from_grid(self):
+        """
+        Return the current configuration as a tuple of rows of symbols.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).from_grid == start_grid
+        True
+        """
+        symbols = _symbols(self.to_grid) + list(self._extra)
+        cells = [symbols[code] for code in self._board]
+        return tuple([tuple(cells[r * self.m:(r + 1) * self.m])
+                      for r in range(self.n)])
+
     def __str__(self):
         """
         Returns a string representation of the puzzle's current
@@ -106,6 +340,126 @@ class MNPuzzle(Puzzle):
             ret += "\n"
         return ret.rstrip()
 
+    def __hash__(self):
+        """
+        Return a hash of this MNPuzzle consistent with __eq__.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return the current configuration packed one byte per cell.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bytes | tuple[int]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).state_key()
+        b'\\x05\\x01\\x02\\x00\\x03\\x04'
+        >>> MNPuzzle(target_grid, target_grid).state_key()
+        b'\\x00\\x01\\x02\\x03\\x04\\x05'
+        """
+        return self._board
+
+    def to_bytes(self):
+        """
+        Return the current configuration packed one byte per cell, or two
+        bytes per cell for grids with 256 symbols or more.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bytes
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> puzzle = MNPuzzle(start_grid, target_grid)
+        >>> puzzle.to_bytes()
+        b'\\x05\\x01\\x02\\x00\\x03\\x04'
+        >>> puzzle.from_bytes(puzzle.to_bytes()) == puzzle
+        True
+        """
+        if isinstance(self._board, bytes):
+            return self._board
+        return b"".join([code.to_bytes(2, "big") for code in self._board])
+
+    def from_bytes(self, data):
+        """
+        Return the MNPuzzle packed into data by to_bytes, working towards
+        the to_grid of MNPuzzle self.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param bytes data: a configuration packed by to_bytes
+        @rtype: MNPuzzle
+        """
+        if isinstance(self._board, bytes):
+            board = bytes(data)
+        else:
+            board = tuple([int.from_bytes(data[i:i + 2], "big")
+                           for i in range(0, len(data), 2)])
+        puzzle = self._move(board, self._find_blank(board))
+        puzzle._solvable = None
+        return puzzle
+
+    def space_key(self):
+        """
+        Return a string identifying MNPuzzle self's to_grid and packing.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: str
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(target_grid, target_grid).space_key()
+        "MNPuzzle 2x3 (('1', '2', '3'), ('4', '5', '*'))"
+        """
+        return "MNPuzzle {}x{} {!r}".format(self.n, self.m, self.to_grid)
+
+    def layer_window(self):
+        """
+        Return 2, since every move of MNPuzzle self can be undone, so its
+        extensions lie in its own layer or the ones either side.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: int
+        """
+        return 2
+
+    def canonical_key(self):
+        """
+        Return the smallest state_key among MNPuzzle self and its images
+        under the symmetries of the board that fix the blank's cell in
+        to_grid, with the tiles renumbered to match.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bytes | tuple[int]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+        >>> a = MNPuzzle((("1", "2", "3"), ("4", "5", "6"), ("7", "*", "8")),
+        ...              target_grid)
+        >>> b = MNPuzzle((("1", "2", "3"), ("4", "5", "*"), ("7", "8", "6")),
+        ...              target_grid)
+        >>> a.canonical_key() == b.canonical_key()
+        True
+        >>> a.canonical_key() == MNPuzzle(target_grid,
+        ...                               target_grid).canonical_key()
+        False
+        """
+        key = self.state_key()
+        conjugations = _conjugations(self.to_grid)
+        if conjugations and max(key) < len(key):
+            best = key
+            for image in conjugations:
+                conjugate = [0] * len(key)
+                for cell, tile in enumerate(key):
+                    conjugate[image[cell]] = image[tile]
+                conjugate = type(key)(conjugate)
+                if conjugate < best:
+                    best = conjugate
+            key = best
+        return key
+
     def extensions(self):
         """
         Return list of legal extensions of MNPuzzle self.
@@ -140,40 +494,223 @@ class MNPuzzle(Puzzle):
         145
         <BLANKLINE>
         """
-        # Initiate a storage array
         ext = []
-        # Find the location of the "*" symbol
-        x = -1
-        y = -1
-        for r in range(len(self.from_grid)):
-            for c in range(len(self.from_grid[r])):
-                if self.from_grid[r][c] == "*":
-                    x, y = r, c
-                    break
-        # Add each possibility sequentially
-        if x - 1 > -1:
-            top_shift = [list(i) for i in self.from_grid]
-            top_shift[x][y] = self.from_grid[x - 1][y]
-            top_shift[x - 1][y] = "*"
-            ext.append(MNPuzzle(tuple(top_shift), self.to_grid))
-        if y - 1 > -1:
-            left_shift = [list(i) for i in self.from_grid]
-            left_shift[x][y] = self.from_grid[x][y - 1]
-            left_shift[x][y - 1] = "*"
-            ext.append(MNPuzzle(tuple(left_shift), self.to_grid))
-        if x + 1 < len(self.from_grid):
-            bottom_shift = [list(i) for i in self.from_grid]
-            bottom_shift[x][y] = self.from_grid[x + 1][y]
-            bottom_shift[x + 1][y] = "*"
-            ext.append(MNPuzzle(tuple(bottom_shift), self.to_grid))
-        if y + 1 < len(self.from_grid[0]):
-            right_shift = [list(i) for i in self.from_grid]
-            right_shift[x][y] = self.from_grid[x][y + 1]
-            right_shift[x][y + 1] = "*"
-            ext.append(MNPuzzle(tuple(right_shift), self.to_grid))
-        # Return the list of possible states
+        blank, board = self._blank, self._board
+        if blank < 0:
+            return ext
+        for cell in neighbour_table(self.n, self.m)[blank]:
+            # slide the symbol in cell into the blank
+            moved = bytearray(board) if type(board) is bytes else list(board)
+            moved[blank], moved[cell] = moved[cell], moved[blank]
+            ext.append(self._move(type(board)(moved), cell))
         return ext
 
+    def _find_blank(self, board):
+        """
+        Return the cell of the blank on board, a board of MNPuzzle self,
+        or -1 if there is none.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param bytes | tuple[int] | list[int] board: the board to search
+        @rtype: int
+        """
+        codes = _codes(self.to_grid)
+        if "*" in codes:
+            code = codes["*"]
+        elif "*" in self._extra:
+            code = len(codes) + self._extra.index("*")
+        else:
+            return -1
+        return board.index(code) if code in board else -1
+
+    def _move(self, board, blank):
+        """
+        Return an MNPuzzle working towards the to_grid of MNPuzzle self,
+        with board board and its blank in cell blank.
+
+        @param MNPuzzle self: this MNPuzzle
+        @param bytes | tuple[int] board: the new board
+        @param int blank: the new cell of the blank
+        @rtype: MNPuzzle
+        """
+        puzzle = MNPuzzle.__new__(MNPuzzle)
+        puzzle.n, puzzle.m, puzzle.to_grid = self.n, self.m, self.to_grid
+        puzzle._board, puzzle._blank = board, blank
+        puzzle._extra = self._extra
+        # no move changes whether a configuration can be solved
+        puzzle._solvable = self._solvable
+        return puzzle
+
+    def is_solvable(self):
+        """
+        Return whether MNPuzzle self can be moved into its to_grid.
+
+        Every move swaps the blank with a neighbour, which flips the parity
+        of the arrangement and of the blank's distance from its goal cell
+        at the same time, so the two parities must agree. This is only
+        decided for a to_grid of distinct symbols with a blank; any other
+        MNPuzzle is reported as not solvable.
+
+        @type self: MNPuzzle
+        @rtype: bool
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+        ...          target_grid).is_solvable()
+        True
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")),
+        ...          target_grid).is_solvable()
+        False
+        """
+        return _distinct(self.to_grid) and self._parity_agrees()
+
+    def _parity_agrees(self):
+        """
+        Return whether the parity of the arrangement of MNPuzzle self
+        agrees with that of its blank's distance from its goal cell,
+        remembering the answer. This takes O(n * m) time the first time.
+
+        If to_grid repeats a symbol or has no blank, tiles have no single
+        goal cell, parity says nothing, and True is returned.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bool
+        """
+        if self._solvable is None:
+            self._solvable = self._parity()
+        return self._solvable
+
+    def _parity(self):
+        """
+        Work out _parity_agrees for MNPuzzle self.
+
+        @param MNPuzzle self: this MNPuzzle
+        @rtype: bool
+        """
+        n, m = self.n, self.m
+        if not _distinct(self.to_grid):
+            return True
+        target = [symbol for row in self.to_grid for symbol in row]
+        board = list(self.state_key())
+        if sorted(board) != list(range(n * m)):
+            # the grids do not hold the same symbols
+            return False
+        blank_tile = target.index("*")
+        if n == 1 or m == 1:
+            # a single line never changes the order of its tiles
+            return ([tile for tile in board if tile != blank_tile] ==
+                    [tile for tile in range(n * m) if tile != blank_tile])
+        # the parity of a permutation is the parity of its length minus its
+        # number of cycles
+        parity, seen = n * m, [False] * (n * m)
+        for cell in range(n * m):
+            if not seen[cell]:
+                parity -= 1
+                while not seen[cell]:
+                    seen[cell] = True
+                    cell = board[cell]
+        blank = board.index(blank_tile)
+        distance = (abs(blank // m - blank_tile // m) +
+                    abs(blank % m - blank_tile % m))
+        return parity % 2 == distance % 2
+
+    def fail_fast(self):
+        """
+        Return True if MNPuzzle self can never be moved into its to_grid.
+
+        Unlike is_solvable, this never rules out an MNPuzzle whose to_grid
+        repeats a symbol or has no blank, since such an MNPuzzle may still
+        be solved.
+
+        @type self: MNPuzzle
+        @rtype: bool
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")),
+        ...          target_grid).fail_fast()
+        True
+        >>> from puzzle_tools import breadth_first_solve, depth_first_solve
+        >>> target_grid = (("A", "A", "B"), ("B", "C", "*"))
+        >>> puzzle = MNPuzzle((("B", "A", "C"), ("A", "*", "B")), target_grid)
+        >>> puzzle.fail_fast(), puzzle.is_solvable()
+        (False, False)
+        >>> breadth_first_solve(puzzle) is not None
+        True
+        >>> depth_first_solve(puzzle) is not None
+        True
+        """
+        return not self._parity_agrees()
+
+    def goal_state(self):
+        """
+        Return the solved MNPuzzle that MNPuzzle self works towards.
+
+        @type self: MNPuzzle
+        @rtype: MNPuzzle
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> print(MNPuzzle(start_grid, target_grid).goal_state())
+        123
+        45*
+        """
+        return MNPuzzle(self.to_grid, self.to_grid)
+
+    def heuristic(self):
+        """
+        Return the Manhattan distance of every symbol from its position
+        in to_grid plus the linear conflict penalty, a lower bound on
+        the number of moves needed to solve MNPuzzle self.
+
+        If to_grid repeats a symbol or has no blank, return instead the
+        distance of every symbol from the nearest cell holding it in
+        to_grid.
+
+        @type self: MNPuzzle
+        @rtype: int
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        3
+        >>> start_grid = (("2", "1", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        4
+        >>> target_grid = (("A", "A", "B"), ("B", "C", "*"))
+        >>> start_grid = (("B", "A", "C"), ("A", "*", "B"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        5
+        """
+        n, m = self.n, self.m
+        blank_code = _codes(self.to_grid).get("*")
+        if not _distinct(self.to_grid):
+            # codes are not goal cells, so measure to the nearest goal
+            # cell holding the same symbol
+            goals = {}
+            for cell, code in enumerate(_goal_board(self.to_grid)):
+                goals.setdefault(code, []).append((cell // m, cell % m))
+            return sum([min([abs(goal_r - cell // m) + abs(goal_c - cell % m)
+                             for goal_r, goal_c in goals[code]])
+                        for cell, code in enumerate(self._board)
+                        if code != blank_code and code in goals])
+        distance = 0
+        # goal columns of tiles already in their goal row, and goal rows
+        # of tiles already in their goal column
+        rows = [[] for _ in range(n)]
+        columns = [[] for _ in range(m)]
+        for cell, goal in enumerate(self._board):
+            r, c = cell // m, cell % m
+            if goal == blank_code or goal >= n * m:
+                continue
+            goal_r, goal_c = goal // m, goal % m
+            distance += abs(goal_r - r) + abs(goal_c - c)
+            if goal_r == r:
+                rows[r].append(goal_c)
+            if goal_c == c:
+                columns[c].append(goal_r)
+        return (distance + sum([linear_conflict(x) for x in rows]) +
+                sum([linear_conflict(x) for x in columns]))
+
     def is_solved(self):
         """
         Return True iff MNPuzzle self is solved.
@@ -191,12 +728,7 @@ class MNPuzzle(Puzzle):
         >>> a2.is_solved()
         True
         """
-        # Return true if every part of both grids are identical
-        for a in range(len(self.from_grid)):
-            for b in range(len(self.from_grid[a])):
-                if self.from_grid[a][b] != self.to_grid[a][b]:
-                    return False
-        return True
+        return self._board == _goal_board(self.to_grid)
 
 
 if __name__ == "__main__":
@@ -204,7 +736,8 @@ if __name__ == "__main__":
     doctest.testmod()
     target_grid = (("1", "2", "3"), ("4", "5", "*"))
     start_grid = (("*", "2", "3"), ("1", "4", "5"))
-    from puzzle_tools import breadth_first_solve, depth_first_solve
+    from puzzle_tools import (breadth_first_solve, depth_first_solve,
+                              astar_solve, bidirectional_solve)
     from time import time
     start = time()
     solution = breadth_first_solve(MNPuzzle(start_grid, target_grid))
@@ -216,3 +749,13 @@ if __name__ == "__main__":
     end = time()
     print("DFS solved: \n\n{} \n\nin {} seconds".format(
         solution, end - start))
+    start = time()
+    solution = astar_solve((MNPuzzle(start_grid, target_grid)))
+    end = time()
+    print("A* solved: \n\n{} \n\nin {} seconds".format(
+        solution, end - start))
+    start = time()
+    solution = bidirectional_solve((MNPuzzle(start_grid, target_grid)))
+    end = time()
+    print("Bidirectional BFS solved: \n\n{} \n\nin {} seconds".format(
+        solution, end - start))
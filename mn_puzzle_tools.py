@@ -0,0 +1,209 @@
+"""
+Some functions for solving MNPuzzles with search specialised to
+sliding puzzles
+"""
+from mn_puzzle import MNPuzzle, neighbour_table, linear_conflict
+from puzzle_tools import PuzzleNode
+
+# returned by the search in ida_star_solve once the goal is reached
+_FOUND = -1
+
+
+def ida_star_solve(puzzle, heuristic=None, stats=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible. Raise ValueError if the to_grid of puzzle repeats a symbol
+    or has no blank, since tiles are then not numbered by their goal
+    cells; search such a puzzle with puzzle_tools instead.
+
+    This is an iterative deepening A* search: repeated depth first
+    searches bounded by moves taken plus estimated moves remaining, so
+    its memory use grows only with the length of the solution. Moves
+    are made and undone in place on a single board, where each tile is
+    numbered by its cell in to_grid (row-major). If heuristic is None
+    the Manhattan distance plus linear conflict is kept up to date
+    incrementally; otherwise heuristic is called after every move with
+    the list of the current cell of each tile, and must never
+    overestimate the moves still needed. If stats is not None, the
+    configurations expanded and generated by every iteration are counted
+    in it.
+
+    @type puzzle: MNPuzzle
+    @type heuristic: (list[int]) -> int | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | None
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> sol = ida_star_solve(MNPuzzle(start_grid, target_grid))
+    >>> print(sol)
+    *23
+    145
+    <BLANKLINE>
+    123
+    *45
+    <BLANKLINE>
+    123
+    4*5
+    <BLANKLINE>
+    123
+    45*
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> start_grid = (("2", "1", "3"), ("4", "5", "*"))
+    >>> ida_star_solve(MNPuzzle(start_grid, target_grid)) is None
+    True
+    >>> target_grid = (("A", "A", "B"), ("B", "C", "*"))
+    >>> start_grid = (("B", "A", "C"), ("A", "*", "B"))
+    >>> ida_star_solve(MNPuzzle(start_grid, target_grid))
+    Traceback (most recent call last):
+    ...
+    ValueError: to_grid must hold distinct symbols and a blank
+    >>> from puzzle_tools import SearchStats
+    >>> stats = SearchStats()
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> _ = ida_star_solve(MNPuzzle(start_grid, target_grid), stats=stats)
+    >>> stats.nodes_expanded, stats.nodes_generated
+    (3, 4)
+    """
+    n, m = puzzle.n, puzzle.m
+    target = [symbol for row in puzzle.to_grid for symbol in row]
+    if len(set(target)) != n * m or "*" not in target:
+        raise ValueError("to_grid must hold distinct symbols and a blank")
+    if puzzle.fail_fast():
+        return None
+    blank_tile = target.index("*")
+    board = list(puzzle.state_key())
+    goal = list(range(n * m))
+    positions = [0] * (n * m)
+    for cell, tile in enumerate(board):
+        positions[tile] = cell
+    neighbours = neighbour_table(n, m)
+    # distance[tile][cell] is the Manhattan distance from cell to the goal
+    # cell of tile, which is 0 for the blank
+    distance = [[0 if tile == blank_tile else
+                 abs(tile // m - cell // m) + abs(tile % m - cell % m)
+                 for cell in range(n * m)] for tile in range(n * m)]
+
+    def row_conflict(r):
+        return linear_conflict([tile % m for tile in board[r * m:r * m + m]
+                                if tile // m == r and tile != blank_tile])
+
+    def column_conflict(c):
+        return linear_conflict([tile // m for tile in board[c::m]
+                                if tile % m == c and tile != blank_tile])
+
+    rows = [row_conflict(r) for r in range(n)]
+    columns = [column_conflict(c) for c in range(m)]
+    path = []
+
+    def search(blank, g, h, bound, back):
+        # Return _FOUND once the goal is reached, leaving the blank's
+        # moves in path; otherwise return the smallest estimate that
+        # exceeded bound
+        if g + h > bound:
+            return g + h
+        if h == 0 and board == goal:
+            return _FOUND
+        if stats is not None:
+            stats.nodes_expanded += 1
+        smallest = float("inf")
+        for cell in neighbours[blank]:
+            if cell == back:
+                # never undo the previous move
+                continue
+            if stats is not None:
+                stats.nodes_generated += 1
+            tile = board[cell]
+            board[blank], board[cell] = tile, blank_tile
+            positions[tile], positions[blank_tile] = blank, cell
+            if heuristic is not None:
+                child_h = heuristic(positions)
+            elif cell // m == blank // m:
+                # moving tile sideways changes which columns hold it
+                old = columns[cell % m], columns[blank % m]
+                columns[cell % m] = column_conflict(cell % m)
+                columns[blank % m] = column_conflict(blank % m)
+                child_h = (h + distance[tile][blank] - distance[tile][cell] +
+                           columns[cell % m] + columns[blank % m] - sum(old))
+            else:
+                old = rows[cell // m], rows[blank // m]
+                rows[cell // m] = row_conflict(cell // m)
+                rows[blank // m] = row_conflict(blank // m)
+                child_h = (h + distance[tile][blank] - distance[tile][cell] +
+                           rows[cell // m] + rows[blank // m] - sum(old))
+            path.append(cell)
+            t = search(cell, g + 1, child_h, bound, blank)
+            if t == _FOUND:
+                return _FOUND
+            path.pop()
+            # undo the move
+            board[blank], board[cell] = blank_tile, tile
+            positions[tile], positions[blank_tile] = cell, blank
+            if heuristic is None and cell // m == blank // m:
+                columns[cell % m], columns[blank % m] = old
+            elif heuristic is None:
+                rows[cell // m], rows[blank // m] = old
+            if t < smallest:
+                smallest = t
+        return smallest
+
+    start = positions[blank_tile]
+    if heuristic is None:
+        bound = (sum([distance[board[cell]][cell] for cell in range(n * m)]) +
+                 sum(rows) + sum(columns))
+    else:
+        bound = heuristic(positions)
+    h = bound
+    while True:
+        t = search(start, 0, h, bound, None)
+        if t == _FOUND:
+            return _replay(puzzle, path)
+        if t == float("inf"):
+            return None
+        bound = t
+
+
+def _replay(puzzle, path):
+    """
+    Return the PuzzleNode path that starts at MNPuzzle puzzle and moves
+    the blank to each cell of path in turn.
+
+    @type puzzle: MNPuzzle
+    @type path: list[int]
+    @rtype: PuzzleNode
+    """
+    n, m = puzzle.n, puzzle.m
+    cells = [symbol for row in puzzle.from_grid for symbol in row]
+    blank = cells.index("*")
+    root = node = PuzzleNode(puzzle)
+    for cell in path:
+        cells[blank], cells[cell] = cells[cell], "*"
+        blank = cell
+        grid = tuple([tuple(cells[r * m:r * m + m]) for r in range(n)])
+        child = PuzzleNode(MNPuzzle(grid, puzzle.to_grid), None, node)
+        node.children = [child]
+        node = child
+    return root
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    from time import time
+    target_grid = (("1", "2", "3", "4"), ("5", "6", "7", "8"),
+                   ("9", "10", "11", "12"), ("13", "14", "15", "*"))
+    # 48 moves from the goal at best
+    start_grid = (("7", "13", "2", "8"), ("12", "1", "5", "*"),
+                  ("3", "4", "6", "10"), ("14", "15", "9", "11"))
+    start = time()
+    solution = ida_star_solve(MNPuzzle(start_grid, target_grid))
+    end = time()
+    moves = 0
+    while solution.children:
+        solution, moves = solution.children[0], moves + 1
+    print("IDA* solved the 15-puzzle in {} moves in {} seconds".format(
+        moves, end - start))
@@ -0,0 +1,553 @@
+"""
+Some functions for solving puzzles in worker processes, either many
+puzzles at once or one hard puzzle split between them
+"""
+import io
+import os
+import pickle
+import queue
+import signal
+import time
+from multiprocessing import Event, Pool, Process, Queue, Value
+from puzzle_tools import PuzzleNode
+
+# the objects shared by every task, in the worker process running them
+_worker_shared = []
+# how many configurations a parallel_depth_first_solve worker visits
+# between checks for cancellation and for idle workers to give work to
+_CHECK_EVERY = 256
+
+
+class _SharingPickler(pickle.Pickler):
+    """
+    A Pickler that writes a reference in place of each shared object, so
+    that objects every task needs are sent to each worker only once.
+    """
+
+    def __init__(self, file, shared):
+        """
+        Create a new _SharingPickler self writing to file, referring to
+        each object of shared by its position.
+
+        @type self: _SharingPickler
+        @type file: io.BytesIO
+        @type shared: list[object]
+        @rtype: None
+        """
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self._positions = {id(obj): i for i, obj in enumerate(shared)}
+
+    def persistent_id(self, obj):
+        """
+        Return the position of obj among the shared objects, or None if
+        it is not one of them and should be pickled as usual.
+
+        @type self: _SharingPickler
+        @type obj: object
+        @rtype: int | None
+        """
+        return self._positions.get(id(obj))
+
+
+class _SharingUnpickler(pickle.Unpickler):
+    """
+    An Unpickler that resolves the references written by _SharingPickler
+    to a list of shared objects.
+    """
+
+    def __init__(self, file, shared):
+        """
+        Create a new _SharingUnpickler self reading from file, resolving
+        references to the objects of shared.
+
+        @type self: _SharingUnpickler
+        @type file: io.BytesIO
+        @type shared: list[object]
+        @rtype: None
+        """
+        pickle.Unpickler.__init__(self, file)
+        self._shared = shared
+
+    def persistent_load(self, pid):
+        """
+        Return the shared object at position pid.
+
+        @type self: _SharingUnpickler
+        @type pid: int
+        @rtype: object
+        """
+        return self._shared[pid]
+
+
+def _dumps(obj, shared):
+    """
+    Return obj pickled with references in place of the objects of shared.
+
+    @type obj: object
+    @type shared: list[object]
+    @rtype: bytes
+    """
+    f = io.BytesIO()
+    _SharingPickler(f, shared).dump(obj)
+    return f.getvalue()
+
+
+def _loads(data, shared):
+    """
+    Return the object pickled in data by _dumps, with its references
+    resolved to the objects of shared.
+
+    @type data: bytes
+    @type shared: list[object]
+    @rtype: object
+    """
+    return _SharingUnpickler(io.BytesIO(data), shared).load()
+
+
+def _start_worker(shared):
+    """
+    Keep the shared objects pickled in shared for the tasks of this
+    worker process.
+
+    @type shared: bytes
+    @rtype: None
+    """
+    _worker_shared[:] = pickle.loads(shared)
+
+
+def _on_alarm(signum, frame):
+    """
+    Stop the puzzle being solved once its time is up.
+
+    @type signum: int
+    @type frame: object
+    @rtype: None
+    """
+    raise TimeoutError("puzzle not solved in time")
+
+
+def _solve_task(task):
+    """
+    Solve one task in a worker process: the index of a puzzle, the
+    puzzle as pickled by _dumps, the strategy to solve it with and the
+    seconds allowed, if limited. Return the index with either the list
+    of puzzles on the solution path (None if there is none), or the
+    exception that stopped strategy, pickled by _dumps.
+
+    @type task: (int, bytes, (Puzzle) -> PuzzleNode | None, float | None)
+    @rtype: (int, bytes)
+    """
+    index, data, strategy, timeout = task
+    puzzle = _loads(data, _worker_shared)
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            node = strategy(puzzle)
+            if node is None:
+                result = None
+            else:
+                # a flat list, since pickling a long chain of PuzzleNodes
+                # would exceed the recursion limit
+                result = [node.puzzle]
+                while node.children:
+                    node = node.children[0]
+                    result.append(node.puzzle)
+            if timeout is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except Exception as error:
+            result = error
+            if timeout is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except TimeoutError as error:
+        # the alarm went off after strategy finished but before the timer
+        # was disarmed; it goes off only once, so this is the last of it
+        result = error
+    return index, _dumps(result, _worker_shared)
+
+
+def solve_many(puzzles, strategy, workers=None, timeout=None, shared=()):
+    """
+    Solve each of puzzles with strategy in a pool of workers worker
+    processes, defaulting to one per CPU, and generate (index, solution)
+    as each puzzle is finished, where index is the puzzle's position in
+    puzzles.
+
+    solution is the path strategy returned, or None if it found none.
+    If strategy raised an exception, or took longer than timeout
+    seconds when timeout is not None, solution is that exception, a
+    TimeoutError for timeouts. Timeouts need SIGALRM, so are only
+    available on Unix.
+
+    Objects in shared, such as a word set used by many puzzles, are
+    sent to each worker once rather than with every puzzle that refers
+    to them. strategy must be a module-level function, such as
+    depth_first_solve, so that workers can find it.
+
+    @type puzzles: list[Puzzle]
+    @type strategy: (Puzzle) -> PuzzleNode | None
+    @type workers: int | None
+    @type timeout: float | None
+    @type shared: list[object] | tuple[object]
+    @rtype: generator[(int, PuzzleNode | None | Exception)]
+
+    >>> from puzzle_tools import breadth_first_solve
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot"}
+    >>> puzzles = [WordLadderPuzzle("cat", "dog", ws),
+    ...            WordLadderPuzzle("cat", "cap", ws)]
+    >>> results = dict(solve_many(puzzles, breadth_first_solve, 2,
+    ...                           shared=[ws]))
+    >>> print(results[0].children[0].children[0].children[0].puzzle)
+    dog -> dog
+    >>> results[1] is None
+    True
+    """
+    shared = list(shared)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tasks = ((index, _dumps(puzzle, shared), strategy, timeout)
+             for index, puzzle in enumerate(puzzles))
+    with Pool(workers, _start_worker, (pickle.dumps(shared),)) as pool:
+        for index, data in pool.imap_unordered(_solve_task, tasks):
+            result = _loads(data, shared)
+            if isinstance(result, list):
+                result = _path_node(result)
+            yield index, result
+
+
+def _path_node(puzzles):
+    """
+    Return the root of a path of PuzzleNodes holding puzzles in order.
+
+    @type puzzles: list[Puzzle]
+    @rtype: PuzzleNode
+    """
+    root = node = PuzzleNode(puzzles[0])
+    for puzzle in puzzles[1:]:
+        node.children = [PuzzleNode(puzzle, None, node)]
+        node = node.children[0]
+    return root
+
+
+def _search_subtrees(shared, tasks, results, pending, idle, cancel):
+    """
+    Search subtrees from tasks, depth first, until cancel is set, for
+    parallel_depth_first_solve.
+
+    Each task is the list of puzzles on the path to a subtree's root,
+    pickled by _dumps. Whenever a worker is idle and no task is waiting,
+    the next unexplored child nearest the root of the subtree being
+    searched is given away as a new task. pending counts the tasks
+    queued or being searched; the worker that brings it to 0 reports
+    that the search is over.
+
+    @type shared: bytes
+    @type tasks: Queue
+    @type results: Queue
+    @type pending: Value
+    @type idle: Value
+    @type cancel: Event
+    @rtype: None
+    """
+    shared = pickle.loads(shared)
+    # configurations searched by this worker, which need never be
+    # searched again since none of them led to a solution
+    visited = set()
+    while not cancel.is_set():
+        try:
+            data = tasks.get(timeout=0.05)
+        except queue.Empty:
+            continue
+        with idle.get_lock():
+            idle.value -= 1
+        try:
+            solution = _search_subtree(_loads(data, shared), shared, tasks,
+                                       pending, idle, cancel, visited)
+        except Exception as error:
+            results.put(("error", _dumps(error, shared)))
+            cancel.set()
+            return
+        if solution is not None:
+            results.put(("solved", _dumps(solution, shared)))
+            cancel.set()
+            return
+        with idle.get_lock():
+            idle.value += 1
+        with pending.get_lock():
+            pending.value -= 1
+            if pending.value == 0:
+                results.put(("exhausted", None))
+
+
+def _search_subtree(path, shared, tasks, pending, idle, cancel, visited):
+    """
+    Return the list of puzzles on a path to a solution through the
+    subtree at the end of path, or None if there is none, searching
+    depth first as in iter_solutions and giving work away to idle
+    workers.
+
+    @type path: list[Puzzle]
+    @type shared: list[object]
+    @type tasks: Queue
+    @type pending: Value
+    @type idle: Value
+    @type cancel: Event
+    @type visited: set[object]
+    @rtype: list[Puzzle] | None
+    """
+    root = PuzzleNode(path[-1])
+    if root.puzzle.fail_fast():
+        return None
+    if root.puzzle.is_solved():
+        return path
+    visited.add(root.puzzle.canonical_key())
+    stack = [(root, root.expand())]
+    steps = 0
+    while stack:
+        steps += 1
+        if steps % _CHECK_EVERY == 0:
+            if cancel.is_set():
+                return None
+            if idle.value > 0 and tasks.empty():
+                _give_away(path, stack, shared, tasks, pending, visited)
+        child = next(stack[-1][1], None)
+        if child is None:
+            stack.pop()
+            continue
+        key = child.puzzle.canonical_key()
+        if key in visited or child.puzzle.fail_fast():
+            continue
+        visited.add(key)
+        if child.puzzle.is_solved():
+            puzzles = []
+            while child is not root:
+                puzzles.append(child.puzzle)
+                child = child.parent
+            return path + puzzles[::-1]
+        stack.append((child, child.expand()))
+    return None
+
+
+def _drain(q):
+    """
+    Discard everything waiting in Queue q.
+
+    @type q: Queue
+    @rtype: None
+    """
+    try:
+        while True:
+            q.get_nowait()
+    except (queue.Empty, OSError, EOFError):
+        pass
+
+
+def _give_away(path, stack, shared, tasks, pending, visited):
+    """
+    Queue the next unexplored child nearest the bottom of stack, if any,
+    as a task of its own, taking it out of this worker's search.
+
+    @type path: list[Puzzle]
+    @type stack: list[(PuzzleNode, generator[PuzzleNode])]
+    @type shared: list[object]
+    @type tasks: Queue
+    @type pending: Value
+    @type visited: set[object]
+    @rtype: None
+    """
+    for depth in range(len(stack) - 1):
+        for child in stack[depth][1]:
+            key = child.puzzle.canonical_key()
+            if key in visited or child.puzzle.fail_fast():
+                continue
+            visited.add(key)
+            puzzles = [node.puzzle for node, _ in stack[1:depth + 1]]
+            # count the task before it is queued, so the count never
+            # reaches 0 while there is still work
+            with pending.get_lock():
+                pending.value += 1
+            tasks.put(_dumps(path + puzzles + [child.puzzle], shared))
+            return
+
+
+def parallel_depth_first_solve(puzzle, workers=None, shared=()):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent, searching depth first in workers worker processes,
+    defaulting to one per CPU.  Return None if this is not possible.
+
+    The top of the search tree is split into subtrees breadth first,
+    and the subtrees are searched depth first by whichever worker is
+    free. A worker with nothing left to search takes unexplored branches
+    from the others, and all workers stop once one finds a solution.
+    Each worker remembers the configurations it has searched, but
+    workers do not share this, so a configuration may be searched by
+    more than one of them. The path found need not be the one
+    depth_first_solve finds.
+
+    puzzle must be picklable. Objects in shared, such as a word set,
+    are sent to each worker once rather than with every subtree.
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+    @type shared: list[object] | tuple[object]
+    @rtype: PuzzleNode | None
+
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> grid = [["*", "*", "*", "*", "*"], ["*", "*", "*", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"], ["*", "*", ".", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"]]
+    >>> solution = parallel_depth_first_solve(
+    ...     GridPegSolitairePuzzle(grid, {"*", ".", "#"}), 2)
+    >>> while solution.children:
+    ...     solution = solution.children[0]
+    >>> solution.puzzle.is_solved()
+    True
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dot"}
+    >>> parallel_depth_first_solve(WordLadderPuzzle("cat", "dog", ws),
+    ...                            2) is None
+    True
+
+    Subtrees still queued once a solution is found must not keep the
+    interpreter from exiting.
+
+    >>> import subprocess, sys
+    >>> code = '''
+    ... from random import Random
+    ... from parallel_tools import parallel_depth_first_solve
+    ... from sudoku_puzzle import SudokuPuzzle
+    ... rand, symbols = Random(0), "ABCDEFGHIJKLMNOP"
+    ... grid = [symbols[(4 * (i % 4) + i // 4 + j) % 16]
+    ...         if rand.random() < 0.5 else "*"
+    ...         for i in range(16) for j in range(16)]
+    ... puzzle = SudokuPuzzle(16, grid, set(symbols), mrv=True)
+    ... assert parallel_depth_first_solve(puzzle, 2) is not None
+    ... '''
+    >>> subprocess.run([sys.executable, "-c", code], timeout=20).returncode
+    0
+    """
+    shared = list(shared)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if puzzle.fail_fast():
+        return None
+    if puzzle.is_solved():
+        return PuzzleNode(puzzle)
+    # split the top of the tree until there are a few subtrees per worker
+    frontier, seen = [[puzzle]], {puzzle.canonical_key()}
+    while frontier and len(frontier) < 4 * workers:
+        layer, frontier = frontier, []
+        for path in layer:
+            for extension in path[-1].extensions():
+                key = extension.canonical_key()
+                if key in seen or extension.fail_fast():
+                    continue
+                seen.add(key)
+                if extension.is_solved():
+                    return _path_node(path + [extension])
+                frontier.append(path + [extension])
+    if not frontier:
+        return None
+    tasks, results = Queue(), Queue()
+    pending, idle = Value("i", len(frontier)), Value("i", workers)
+    cancel = Event()
+    for path in frontier:
+        tasks.put(_dumps(path, shared))
+    processes = [Process(target=_search_subtrees,
+                         args=(pickle.dumps(shared), tasks, results, pending,
+                               idle, cancel))
+                 for _ in range(workers)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+    try:
+        while True:
+            try:
+                kind, data = results.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not any([process.is_alive() for process in processes]):
+                    raise RuntimeError("all search workers stopped")
+    finally:
+        cancel.set()
+        # subtrees left unsearched would keep each queue's feeder thread
+        # blocked writing them, and its process waiting on it at exit, so
+        # keep reading until the workers have finished writing and exited
+        deadline = time.monotonic() + 1
+        while (any([process.is_alive() for process in processes]) and
+               time.monotonic() < deadline):
+            _drain(tasks)
+            _drain(results)
+            time.sleep(0.01)
+        stopped = True
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+                stopped = False
+        for q in (tasks, results):
+            # a worker stopped part way through writing leaves a message
+            # that could never be read in full
+            if stopped:
+                _drain(q)
+            q.close()
+            q.cancel_join_thread()
+    if kind == "error":
+        raise _loads(data, shared)
+    if kind == "solved":
+        return _path_node(_loads(data, shared))
+    return None
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    from mn_puzzle import MNPuzzle
+    from puzzle_tools import astar_solve
+    from random import Random
+    # random solvable 3x3 puzzles, made by shuffling the target grid
+    target_grid = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+    rand = Random(0)
+    puzzles = []
+    while len(puzzles) < 40:
+        cells = [symbol for row in target_grid for symbol in row]
+        rand.shuffle(cells)
+        puzzle = MNPuzzle(tuple([tuple(cells[r * 3:r * 3 + 3])
+                                 for r in range(3)]), target_grid)
+        if puzzle.is_solvable():
+            puzzles.append(puzzle)
+    start = time.time()
+    for puzzle in puzzles:
+        astar_solve(puzzle)
+    end = time.time()
+    print("solved {} 3x3 puzzles one at a time in {} seconds".format(
+        len(puzzles), end - start))
+    start = time.time()
+    for index, solution in solve_many(puzzles, astar_solve):
+        assert solution is not None
+    end = time.time()
+    print("solved {} 3x3 puzzles with {} workers in {} seconds".format(
+        len(puzzles), os.cpu_count(), end - start))
+    from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    from puzzle_tools import depth_first_solve
+    # the French board with the first cell of its third row empty
+    grid = [list(row) for row in ["##***##", "#*****#", ".******", "*******",
+                                  "*******", "#*****#", "##***##"]]
+    puzzle = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    start = time.time()
+    depth_first_solve(puzzle)
+    end = time.time()
+    print("solved 7x7 French peg solitaire depth first in {} seconds".format(
+        end - start))
+    start = time.time()
+    solution = parallel_depth_first_solve(puzzle)
+    end = time.time()
+    while solution.children:
+        solution = solution.children[0]
+    assert solution.puzzle.is_solved()
+    print("solved 7x7 French peg solitaire with {} workers in {} "
+          "seconds".format(os.cpu_count(), end - start))
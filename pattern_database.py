@@ -0,0 +1,301 @@
+"""
+Additive pattern databases for MNPuzzles, precomputed once per target
+grid and stored on disk
+"""
+import json
+import mmap
+from mn_puzzle import MNPuzzle, neighbour_table
+
+# marks table entries for placements that were never reached
+_UNREACHED = 255
+
+
+def _rank(cells, size):
+    """
+    Return the index of the arrangement of distinct cells among all
+    arrangements of len(cells) distinct cells of a size-cell grid.
+
+    @type cells: list[int] | tuple[int]
+    @type size: int
+    @rtype: int
+
+    >>> _rank([0, 1], 3), _rank([2, 1], 3), _rank([2, 0], 3)
+    (0, 5, 4)
+    """
+    rank = 0
+    for i in range(len(cells)):
+        smaller = 0
+        for j in range(i):
+            if cells[j] < cells[i]:
+                smaller += 1
+        rank = rank * (size - i) + cells[i] - smaller
+    return rank
+
+
+def _region(start, occupied, neighbours):
+    """
+    Return the cells the blank can reach from cell start without moving
+    a tile in an occupied cell.
+
+    @type start: int
+    @type occupied: list[bool]
+    @type neighbours: tuple[tuple[int]]
+    @rtype: list[int]
+    """
+    region, i = [start], 0
+    reached = {start}
+    while i < len(region):
+        for cell in neighbours[region[i]]:
+            if not occupied[cell] and cell not in reached:
+                reached.add(cell)
+                region.append(cell)
+        i += 1
+    return region
+
+
+class PatternDatabase:
+    """
+    The fewest moves of a set of pattern tiles needed to bring them from
+    each arrangement to their cells in a target grid, counting only
+    moves of pattern tiles, so that databases for disjoint patterns can
+    be added together.
+    """
+
+    def __init__(self, to_grid, pattern, table):
+        """
+        Create a new PatternDatabase self for symbols pattern working
+        towards to_grid, with table indexed by the rank of the cells
+        holding the pattern's symbols.
+
+        @type self: PatternDatabase
+        @type to_grid: tuple[tuple[str]]
+        @type pattern: list[str]
+        @type table: bytes | bytearray | memoryview
+        @rtype: None
+        """
+        self.to_grid = tuple([tuple(row) for row in to_grid])
+        self.pattern = tuple(pattern)
+        self.table = table
+        target = [symbol for row in self.to_grid for symbol in row]
+        self._size = len(target)
+        # pattern tiles numbered by their goal cell, as in ida_star_solve
+        self._tiles = [target.index(symbol) for symbol in self.pattern]
+
+    def lookup(self, positions):
+        """
+        Return the moves needed by the pattern tiles, where positions
+        holds the current cell of the tile whose goal is each cell.
+
+        @type self: PatternDatabase
+        @type positions: list[int]
+        @rtype: int
+        """
+        return self.table[_rank([positions[tile] for tile in self._tiles],
+                                self._size)]
+
+    def save(self, path):
+        """
+        Write PatternDatabase self to the file at path: a one-line JSON
+        header followed by the table as raw bytes.
+
+        @type self: PatternDatabase
+        @type path: str
+        @rtype: None
+        """
+        header = json.dumps({"to_grid": self.to_grid,
+                             "pattern": self.pattern,
+                             "size": len(self.table)})
+        with open(path, "wb") as f:
+            f.write(header.encode() + b"\n")
+            f.write(self.table)
+
+
+def build_pattern_database(to_grid, pattern):
+    """
+    Return the PatternDatabase for symbols pattern working towards
+    to_grid.
+
+    This is a breadth first search backwards from to_grid over abstract
+    states that only record the cells of the pattern's symbols and the
+    region of other cells the blank can roam without moving a pattern
+    tile, so each step of the search moves one pattern tile.
+
+    @type to_grid: tuple[tuple[str]]
+    @type pattern: list[str]
+    @rtype: PatternDatabase
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> db = build_pattern_database(target_grid, ["1", "2", "3", "4", "5"])
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> db.lookup(tile_positions(MNPuzzle(start_grid, target_grid)))
+    3
+    """
+    assert "*" not in pattern
+    n, m = len(to_grid), len(to_grid[0])
+    size = n * m
+    target = [symbol for row in to_grid for symbol in row]
+    neighbours = neighbour_table(n, m)
+    count = 1
+    for i in range(len(pattern)):
+        count *= size - i
+    table = bytearray([_UNREACHED]) * count
+    # one bit for each arrangement and cell of the blank's region
+    visited = bytearray((count * size + 7) // 8)
+
+    def visit(cells, blank):
+        # Add the state to the next layer unless it was already visited
+        occupied = [False] * size
+        for cell in cells:
+            occupied[cell] = True
+        blank = min(_region(blank, occupied, neighbours))
+        rank = _rank(cells, size)
+        state = rank * size + blank
+        if not visited[state >> 3] & (1 << (state & 7)):
+            visited[state >> 3] |= 1 << (state & 7)
+            if table[rank] == _UNREACHED:
+                table[rank] = min(distance, _UNREACHED - 1)
+            layer.append((cells, blank))
+
+    distance, layer = 0, []
+    visit(tuple([target.index(symbol) for symbol in pattern]),
+          target.index("*"))
+    while layer:
+        previous, layer = layer, []
+        distance += 1
+        for cells, blank in previous:
+            occupied = [False] * size
+            for cell in cells:
+                occupied[cell] = True
+            # slide any pattern tile next to the blank's region into it
+            for cell in _region(blank, occupied, neighbours):
+                for source in neighbours[cell]:
+                    if occupied[source]:
+                        moved = list(cells)
+                        moved[cells.index(source)] = cell
+                        visit(tuple(moved), source)
+    return PatternDatabase(to_grid, pattern, table)
+
+
+def load_pattern_database(path):
+    """
+    Return the PatternDatabase saved at path, with its table memory
+    mapped rather than read into memory.
+
+    @type path: str
+    @rtype: PatternDatabase
+
+    >>> import os, tempfile
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> db = build_pattern_database(target_grid, ["1", "2"])
+    >>> path = os.path.join(tempfile.mkdtemp(), "2x3.patterndb")
+    >>> db.save(path)
+    >>> loaded = load_pattern_database(path)
+    >>> loaded.pattern, bytes(loaded.table) == bytes(db.table)
+    (('1', '2'), True)
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    offset = mapped.find(b"\n") + 1
+    header = json.loads(mapped[:offset].decode())
+    table = memoryview(mapped)[offset:offset + header["size"]]
+    return PatternDatabase(header["to_grid"], header["pattern"], table)
+
+
+def standard_patterns(to_grid):
+    """
+    Return a partition of the symbols of to_grid into patterns: a single
+    pattern of every tile for grids of at most 9 cells, the usual 6-6-3
+    split for 4x4 grids, and row-major groups of 6 otherwise.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: list[list[str]]
+
+    >>> target_grid = (("1", "2", "3", "4"), ("5", "6", "7", "8"),
+    ...                ("9", "10", "11", "12"), ("13", "14", "15", "*"))
+    >>> for pattern in standard_patterns(target_grid): print(pattern)
+    ['1', '5', '6', '9', '10', '13']
+    ['7', '8', '11', '12', '14', '15']
+    ['2', '3', '4']
+    """
+    target = [symbol for row in to_grid for symbol in row]
+    tiles = [symbol for symbol in target if symbol != "*"]
+    if len(target) <= 9:
+        return [tiles]
+    if len(to_grid) == 4 and len(to_grid[0]) == 4 and target[15] == "*":
+        return [[target[i] for i in cells]
+                for cells in [(0, 4, 5, 8, 9, 12), (6, 7, 10, 11, 13, 14),
+                              (1, 2, 3)]]
+    return [tiles[i:i + 6] for i in range(0, len(tiles), 6)]
+
+
+def tile_positions(puzzle):
+    """
+    Return the current cell of the tile whose goal is each cell of
+    MNPuzzle puzzle, the argument PatternDatabase.lookup expects.
+
+    @type puzzle: MNPuzzle
+    @rtype: list[int]
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> tile_positions(MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+    ...                         target_grid))
+    [3, 1, 2, 4, 5, 0]
+    """
+    positions = [0] * (puzzle.n * puzzle.m)
+    for cell, tile in enumerate(puzzle.state_key()):
+        positions[tile] = cell
+    return positions
+
+
+def additive_heuristic(databases):
+    """
+    Return a heuristic for ida_star_solve that adds the estimates of
+    databases, whose patterns must be disjoint.
+
+    @type databases: list[PatternDatabase]
+    @rtype: (list[int]) -> int
+
+    >>> from mn_puzzle_tools import ida_star_solve
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> h = additive_heuristic([build_pattern_database(target_grid, p)
+    ...                         for p in [["1", "2"], ["3", "4", "5"]]])
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> print(ida_star_solve(MNPuzzle(start_grid, target_grid), h)
+    ...       .children[0].puzzle)
+    123
+    *45
+    """
+    lookups = [db.lookup for db in databases]
+
+    def heuristic(positions):
+        total = 0
+        for lookup in lookups:
+            total += lookup(positions)
+        return total
+    return heuristic
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    import os
+    from mn_puzzle_tools import ida_star_solve
+    from time import time
+    target_grid = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+    path = "3x3.patterndb"
+    if not os.path.exists(path):
+        start = time()
+        build_pattern_database(target_grid,
+                               standard_patterns(target_grid)[0]).save(path)
+        print("built 3x3 pattern database in {} seconds".format(
+            time() - start))
+    h = additive_heuristic([load_pattern_database(path)])
+    start_grid = (("8", "6", "7"), ("2", "5", "4"), ("3", "*", "1"))
+    start = time()
+    solution = ida_star_solve(MNPuzzle(start_grid, target_grid), h)
+    end = time()
+    moves = 0
+    while solution.children:
+        solution, moves = solution.children[0], moves + 1
+    print("IDA* with a pattern database solved 3x3 in {} moves in {} "
+          "seconds".format(moves, end - start))
@@ -3,6 +3,8 @@ class Puzzle:
     Snapshot of a full-information puzzle, which may be solved, unsolved,
     or even unsolvable.
     """
+    # no instance attributes here, so subclasses may use __slots__
+    __slots__ = ()
 
     def fail_fast(self):
         """
@@ -39,3 +41,143 @@ class Puzzle:
         @rtype: generator[Puzzle]
         """
         raise NotImplementedError
+
+    def goal_state(self):
+        """
+        Return the solved configuration Puzzle self works towards, or
+        None if there is no single such configuration.
+
+        Override this in a subclass with a unique solved configuration
+        to let bidirectional_solve search backwards from it.
+
+        @type self: Puzzle
+        @rtype: Puzzle | None
+        """
+        return None
+
+    def reverse_extensions(self):
+        """
+        Return list of configurations that have Puzzle self as a legal
+        extension.
+
+        By default every extension can be undone by another, so these
+        are just the extensions of self. Override this in a subclass
+        whose extensions cannot be undone.
+
+        @type self: Puzzle
+        @rtype: list[Puzzle]
+        """
+        return self.extensions()
+
+    def heuristic(self):
+        """
+        Return an estimate of how many extensions are needed to solve
+        Puzzle self.
+
+        Override this in a subclass to guide informed solvers such as
+        astar_solve, which find a shortest solution as long as the
+        estimate never exceeds the true number of extensions.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def state_key(self):
+        """
+        Return a compact hashable key identifying the configuration of
+        Puzzle self.
+
+        Two puzzles working towards the same goal have equal keys iff
+        they are in the same configuration, so solvers use the key to
+        remember which configurations they have already visited.
+        Override this in a subclass with something cheaper than the
+        default, which falls back on str(self).
+
+        @type self: Puzzle
+        @rtype: object
+        """
+        return str(self)
+
+    def canonical_key(self):
+        """
+        Return a hashable key shared by Puzzle self and every
+        configuration symmetric to it.
+
+        Solvers key their tables of visited configurations on this, so
+        only one of each set of symmetric configurations is searched.
+        Configurations with equal canonical keys must be alike in
+        whether they are solved or fail fast, and in how many extensions
+        they are from a solution. By default no configurations are
+        considered symmetric and this is just the state_key.
+
+        @type self: Puzzle
+        @rtype: object
+        """
+        return self.state_key()
+
+    def to_bytes(self):
+        """
+        Return the configuration of Puzzle self packed into bytes, from
+        which from_bytes can rebuild it.
+
+        Configurations working towards the same goal must pack into the
+        same number of bytes. Override this, and from_bytes, in a
+        subclass to search it with external_bfs.
+
+        @type self: Puzzle
+        @rtype: bytes
+        """
+        raise NotImplementedError
+
+    def from_bytes(self, data):
+        """
+        Return the configuration packed into data by to_bytes, working
+        towards the same goal as Puzzle self.
+
+        @type self: Puzzle
+        @type data: bytes
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def space_key(self):
+        """
+        Return a string identifying the configurations Puzzle self works
+        among: those towards the same goal, with the same extensions,
+        packed the same way by to_bytes.
+
+        external_bfs records this to tell whether a search it finds on
+        disk is of the same configurations. Override this in a subclass
+        that implements to_bytes, adding whatever besides its type fixes
+        its goal and board.
+
+        @type self: Puzzle
+        @rtype: str
+        """
+        return type(self).__name__
+
+    def layer_window(self):
+        """
+        Return how many layers of a breadth first search, counting back
+        from and including the layer of Puzzle self, may hold extensions
+        of self, or None if extensions may lie in any earlier layer.
+
+        external_bfs drops repeats of only these layers from the layer
+        after self's. Override this in a subclass whose extensions can
+        all be undone, where it is 2, or whose extensions always take it
+        further from every earlier configuration, where it is 0.
+
+        @type self: Puzzle
+        @rtype: int | None
+        """
+        return None
+
+    def __hash__(self):
+        """
+        Return a hash of Puzzle self consistent with its state_key.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
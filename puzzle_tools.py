@@ -3,137 +3,943 @@ Some functions for working with puzzles
 """
 from puzzle import Puzzle
 from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# import resource
-import sys
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-sys.setrecursionlimit(10**6)
+from heapq import heappush, heappop
+from operator import methodcaller
+from time import perf_counter
 
+# the Puzzle methods solvers call when no SearchStats are being gathered
+_FAIL_FAST = methodcaller("fail_fast")
+_IS_SOLVED = methodcaller("is_solved")
+_HEURISTIC = methodcaller("heuristic")
 
-def depth_first_solve(puzzle):
+
+def depth_first_solve(puzzle, max_depth=None, stats=None, budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
+
+    If max_depth is not None, only paths of at most max_depth
+    extensions from puzzle are searched. If stats is not None, the
+    search is recorded in it. If budget is not None, the search stops
+    once it is spent and a SearchResult is returned instead of a path;
+    a search limited by max_depth that finds nothing is reported as
+    exhausted rather than unsolvable.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type max_depth: int | None
+    @type stats: SearchStats | None
+    @type budget: Budget | None
+    @rtype: PuzzleNode | SearchResult | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog"}
+    >>> sol = depth_first_solve(WordLadderPuzzle("cat", "dog", ws))
+    >>> while sol.children:
+    ...     sol = sol.children[0]
+    >>> print(sol.puzzle)
+    dog -> dog
+    >>> depth_first_solve(WordLadderPuzzle("cat", "dog", ws), 2) is None
+    True
+    >>> depth_first_solve(WordLadderPuzzle("cat", "dog", ws), 2,
+    ...                   budget=Budget()).status
+    'exhausted'
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> grid = [list(row) for row in ["##***##", "#*****#", "***.***",
+    ...                               "*******", "*******", "#*****#",
+    ...                               "##***##"]]
+    >>> start = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    >>> result = depth_first_solve(start, budget=Budget(nodes=100))
+    >>> result.status, result.best.heuristic(), result.best == start
+    ('exhausted', 0, False)
+    """
+    if budget is not None:
+        return _budgeted(lambda monitor: depth_first_solve(
+            puzzle, max_depth, monitor), budget, stats, _HEURISTIC,
+            max_depth is None)
+    return next(iter_solutions(puzzle, max_depth, stats), None)
+
+
+def iter_solutions(puzzle, max_depth=None, stats=None):
     """
-    # # This is an iterative depth first search. It works but we decided that
-    # # the recursive implementation was faster
-    # def search_stack(s, seen):
-    #     # Stack to search for extension that solves puzzle state
-    #     while len(s) > 0:
-    #         # Pop the next extension to be checked but do not keep it removed
-    #         curr_ext = s.pop()
-    #         s.append(curr_ext)
-    #         # Check if curr_ext has already been processed
-    #         if str(curr_ext.puzzle) not in seen and \
-    #                 not curr_ext.puzzle.fail_fast():
-    #             if curr_ext.puzzle.is_solved():
-    #                 curr_ext.children = []
-    #                 # If the puzzle is solved we construct a solution
-    #                 # array by going up the path that we took
-    #                 while curr_ext.parent is not None:
-    #                     tmp = curr_ext.parent
-    #                     tmp.children = [curr_ext]
-    #                     curr_ext = tmp
-    #                 return curr_ext
-    #             else:
-    #                 seen.add(str(curr_ext.puzzle))
-    #                 for child in curr_ext.children:
-    #                     children = [i for i in child.extensions()]
-    #                     s.append(PuzzleNode(child, children, curr_ext))
-    #         # If the curr_ext has already been processed, pop it from stack
-    #         else:
-    #             s.pop()
-    #     return None
-    #
-    # configs_seen = set()
-    # stack = deque()
-    # ext = [i for i in puzzle.extensions()]
-    # p_node = PuzzleNode(puzzle, ext)
-    # stack.append(p_node)
-    # return search_stack(stack, configs_seen)
-
-    # Recursive depth first search. It was faster than the iterative version
-    # when we tested
-    def dfs(node, visited, solution=[None]):
-        # Add node to the set of visited nodes
-        visited.add(str(node.puzzle))
-        if node.puzzle.is_solved():
-            node.children = []
-            # If the puzzle is solved we construct a solution
-            # array by going up the path that we took
-            while node.parent is not None:
-                tmp = node.parent
-                tmp.children = [node]
-                node = tmp
-            # solution is a list of 1 element because it needed to be immutable
-            solution[0] = node
-        # If a solution is not found, run dfs on all children that have not been
-        # visited
-        if solution == [None]:
-            for next_ in [e for e in node.puzzle.extensions()
-                          if str(e) not in visited and not e.fail_fast()]:
-                dfs(PuzzleNode(next_, [i for i in next_.extensions()], node),
-                    visited, solution)
-        return solution
-
-    visited_ = set()
-    ext = [i for i in puzzle.extensions()]
-    p_node = PuzzleNode(puzzle, ext)
-    return dfs(p_node, visited_)[0]
-
-
-def breadth_first_solve(puzzle):
+    Generate a path from PuzzleNode(puzzle) to each distinct solved
+    configuration reachable from puzzle, in depth first order, with each
+    child containing an extension of the puzzle in its parent.
+
+    If max_depth is not None, only paths of at most max_depth
+    extensions from puzzle are searched. Solved configurations are not
+    extended any further, and configurations with the same
+    canonical_key are searched, and generated, only once. If stats is
+    not None, the search is recorded in it.
+
+    @type puzzle: Puzzle
+    @type max_depth: int | None
+    @type stats: SearchStats | None
+    @rtype: generator[PuzzleNode]
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "*", "*"]
+    >>> grid += ["*", "*", "D", "C"]
+    >>> grid += ["D", "C", "*", "*"]
+    >>> for sol in iter_solutions(SudokuPuzzle(4, grid, set("ABCD"))):
+    ...     while sol.children:
+    ...         sol = sol.children[0]
+    ...     print(sol.puzzle)
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    AB|CD
+    CD|BA
+    -----
+    BA|DC
+    DC|AB
+    """
+    # Iterative depth first search. Each entry of the stack is a node on
+    # the current path together with the generator of its unexplored
+    # children, so the stack never grows past the length of the path
+    expand, fail_fast, is_solved = _probes(stats)
+    root = PuzzleNode(puzzle)
+    if fail_fast(puzzle):
+        return
+    if is_solved(puzzle):
+        yield _copy_path(root)
+        return
+    # Map each visited configuration, up to symmetry, to the depth it was
+    # reached at
+    visited = {puzzle.canonical_key(): 0}
+    # Solved configurations already generated, which a depth limit may
+    # otherwise reach again by a shorter path
+    solved = set()
+    stack = [(root, expand(root))]
+    if stats is not None:
+        stats._reached(len(stack), len(visited))
+    while stack:
+        child = next(stack[-1][1], None)
+        if child is None:
+            # All children of the node on top of the stack are explored
+            stack.pop()
+            continue
+        depth = len(stack)
+        key = child.puzzle.canonical_key()
+        # Under a depth limit a configuration is searched again if it is
+        # reached by a shorter path, since more of its subtree now fits
+        if key in visited and (max_depth is None or visited[key] <= depth):
+            if stats is not None:
+                stats.duplicates_pruned += 1
+            continue
+        if fail_fast(child.puzzle):
+            continue
+        visited[key] = depth
+        if stats is not None:
+            stats._reached(len(stack), len(visited))
+        if is_solved(child.puzzle):
+            if key not in solved:
+                solved.add(key)
+                yield _copy_path(child)
+        elif max_depth is None or depth < max_depth:
+            stack.append((child, expand(child)))
+            if stats is not None:
+                stats._reached(len(stack), len(visited))
+
+
+def count_solutions(puzzle, limit=None, stats=None):
+    """
+    Return the number of distinct solved configurations reachable from
+    puzzle, counting no further than limit if it is not None.
+    Configurations with the same canonical_key are counted once.
+
+    The search stops as soon as limit solutions are found, so checking
+    that a puzzle has exactly one solution with limit=2 costs no more
+    than finding two. If stats is not None, the search is recorded in
+    it.
+
+    @type puzzle: Puzzle
+    @type limit: int | None
+    @type stats: SearchStats | None
+    @rtype: int
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "*", "*"]
+    >>> grid += ["*", "*", "D", "C"]
+    >>> grid += ["D", "C", "*", "*"]
+    >>> count_solutions(SudokuPuzzle(4, grid, set("ABCD")))
+    2
+    >>> count_solutions(SudokuPuzzle(4, ["*"] * 16, set("ABCD")), 10)
+    10
+    >>> grid[6] = "A"
+    >>> count_solutions(SudokuPuzzle(4, grid, set("ABCD")), 2)
+    1
+    """
+    count = 0
+    if limit is not None and limit <= 0:
+        return count
+    for _ in iter_solutions(puzzle, None, stats):
+        count += 1
+        if count == limit:
+            break
+    return count
+
+
+def breadth_first_solve(puzzle, stats=None, budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
+    If stats is not None, the search is recorded in it. If budget is not
+    None, the search stops once it is spent and a SearchResult is
+    returned instead of a path.
+
+    Only the configurations waiting to be expanded are kept whole. Every
+    other configuration reached is remembered by its canonical key and
+    that of its parent, and the path is rebuilt by following the keys of
+    the solution's ancestors through the extensions of puzzle.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type stats: SearchStats | None
+    @type budget: Budget | None
+    @rtype: PuzzleNode | SearchResult | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot"}
+    >>> stats = SearchStats()
+    >>> sol = breadth_first_solve(WordLadderPuzzle("cat", "dog", ws), stats)
+    >>> stats.nodes_expanded, stats.nodes_generated, stats.duplicates_pruned
+    (3, 13, 9)
+    >>> stats.max_frontier, stats.peak_visited
+    (2, 5)
     """
-    def search_queue(q, seen):
-        # Queue to search for extension that solves puzzle state
-        while len(q) > 0:
-            # Pop the next extension to be checked
-            curr_ext = q.popleft()
-            # Check if curr_ext has already been processed
-            # If it has the next iteration of the while loop begins
-            if str(curr_ext.puzzle) not in seen and \
-                    not curr_ext.puzzle.fail_fast():
-                # Add curr_ext to the set <seen> because it has now
-                # been seen
-                seen.add(str(curr_ext.puzzle))
-                # Check if we have found the solution
-                if curr_ext.puzzle.is_solved():
-                    curr_ext.children = []
-                    # If the puzzle is solved we construct a solution
-                    # array by going up the path that we took
-                    while curr_ext.parent is not None:
-                        tmp = curr_ext.parent
-                        tmp.children = [curr_ext]
-                        curr_ext = tmp
-                    return curr_ext
-                else:
-                    # Otherwise another set of steps is added to the queue
-                    # to be processed
-                    for child in curr_ext.children:
-                        # If a possible move has already been seen it is
-                        # ignored
-                        if str(child) not in seen:
-                            children = [i for i in child.extensions()]
-                            q.append(PuzzleNode(child, children, curr_ext))
-        # Return None if all steps are exhausted without finding a solution
+    if budget is not None:
+        return _budgeted(lambda monitor: breadth_first_solve(
+            puzzle, monitor), budget, stats, _HEURISTIC)
+    _, fail_fast, is_solved = _probes(stats)
+    if fail_fast(puzzle):
         return None
+    if is_solved(puzzle):
+        return PuzzleNode(puzzle)
+    # Map the canonical key of each configuration reached to that of the
+    # configuration it was first reached from. Only the keys are kept;
+    # the path is rebuilt from them once a solution is found
+    parents = {puzzle.canonical_key(): None}
+    # Configurations waiting to be expanded, with their keys, oldest first
+    queue = deque([(puzzle, puzzle.canonical_key())])
+    while queue:
+        current, key = queue.popleft()
+        if stats is not None:
+            extensions = stats._extensions(current)
+        else:
+            extensions = current.extensions()
+        for extension in extensions:
+            child_key = extension.canonical_key()
+            if child_key in parents:
+                if stats is not None:
+                    stats.duplicates_pruned += 1
+                continue
+            if fail_fast(extension):
+                continue
+            parents[child_key] = key
+            if is_solved(extension):
+                if stats is not None:
+                    stats._reached(len(queue), len(parents))
+                keys = [child_key]
+                while parents[keys[-1]] is not None:
+                    keys.append(parents[keys[-1]])
+                return _replay(puzzle, keys[-2::-1])
+            queue.append((extension, child_key))
+        if stats is not None:
+            stats._reached(len(queue), len(parents))
+    return None
+
+
+def astar_solve(puzzle, heuristic=None, stats=None, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
+
+    Configurations are searched in order of the number of extensions
+    taken to reach them plus heuristic's estimate of the number still
+    needed, so the path is a shortest one whenever heuristic never
+    overestimates. heuristic defaults to Puzzle.heuristic. If stats is
+    not None, the search is recorded in it. If budget is not None, the
+    search stops once it is spent and a SearchResult is returned
+    instead of a path.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int | None
+    @type stats: SearchStats | None
+    @type budget: Budget | None
+    @rtype: PuzzleNode | SearchResult | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot"}
+    >>> sol = astar_solve(WordLadderPuzzle("cat", "dog", ws))
+    >>> path = []
+    >>> while sol.children:
+    ...     path.append(str(sol.puzzle))
+    ...     sol = sol.children[0]
+    >>> len(path)
+    3
+    >>> result = astar_solve(WordLadderPuzzle("cat", "dog", ws),
+    ...                      budget=Budget(nodes=2))
+    >>> result.status, result.solution, result.best.state_key()
+    ('exhausted', None, 'dot')
+    """
+    if heuristic is None:
+        heuristic = _HEURISTIC
+    if budget is not None:
+        return _budgeted(lambda monitor: astar_solve(
+            puzzle, heuristic, monitor), budget, stats, heuristic)
+    expand, fail_fast, is_solved = _probes(stats)
+    if fail_fast(puzzle):
+        return None
+    # Number of extensions on the best path found to each configuration,
+    # up to symmetry
+    cost = {puzzle.canonical_key(): 0}
+    # Heap of (estimated total, -extensions so far, insertion count, node)
+    # so ties favour deeper nodes, then the order they were found in
+    frontier = [(heuristic(puzzle), 0, 0, PuzzleNode(puzzle))]
+    count = 1
+    while frontier:
+        _, g, _, node = heappop(frontier)
+        g = -g
+        # Skip entries superseded by a shorter path to the same configuration
+        if cost[node.puzzle.canonical_key()] < g:
+            continue
+        if is_solved(node.puzzle):
+            return _solution_path(node)
+        for child in expand(node):
+            key = child.puzzle.canonical_key()
+            if key in cost and cost[key] <= g + 1:
+                if stats is not None:
+                    stats.duplicates_pruned += 1
+                continue
+            if fail_fast(child.puzzle):
+                continue
+            cost[key] = g + 1
+            heappush(frontier, (g + 1 + heuristic(child.puzzle), -g - 1,
+                                count, child))
+            count += 1
+        if stats is not None:
+            stats._reached(len(frontier), len(cost))
+    return None
+
+
+def bidirectional_solve(puzzle, stats=None, budget=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Breadth first searches grow a layer at a time from puzzle and from
+    puzzle.goal_state(), the latter following reverse_extensions, and
+    the path is stitched together where they meet. Puzzles without a
+    goal state are solved with breadth_first_solve instead. If stats is
+    not None, the search is recorded in it, with both frontiers and both
+    tables of reached configurations counted together. If budget is not
+    None, the search stops once it is spent and a SearchResult is
+    returned instead of a path.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type budget: Budget | None
+    @rtype: PuzzleNode | SearchResult | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cap", "cat", "cot", "cog", "dog", "log"}
+    >>> sol = bidirectional_solve(WordLadderPuzzle("cap", "dog", ws))
+    >>> path = [sol.puzzle]
+    >>> while sol.children:
+    ...     sol = sol.children[0]
+    ...     path.append(sol.puzzle)
+    >>> [p.state_key() for p in path]
+    ['cap', 'cat', 'cot', 'cog', 'dog']
+    >>> bidirectional_solve(WordLadderPuzzle("cap", "cot", {"cap", "cot"}),
+    ...                     budget=Budget(seconds=1)).status
+    'unsolvable'
+    """
+    if budget is not None:
+        return _budgeted(lambda monitor: bidirectional_solve(
+            puzzle, monitor), budget, stats, _HEURISTIC)
+    goal = puzzle.goal_state()
+    if goal is None:
+        return breadth_first_solve(puzzle, stats)
+    _, fail_fast, is_solved = _probes(stats)
+    if fail_fast(puzzle):
+        return None
+    start = PuzzleNode(puzzle)
+    if is_solved(puzzle):
+        return _solution_path(start)
+    # Nodes reached from each end, keyed by configuration. The parent of
+    # a node reached from the goal is one step closer to the goal. These
+    # are keyed on state_key rather than canonical_key, since the two
+    # halves of the path must meet in the very same configuration
+    forward = {puzzle.state_key(): start}
+    backward = {goal.state_key(): PuzzleNode(goal)}
+    forward_layer, backward_layer = [start], [backward[goal.state_key()]]
+    while forward_layer and backward_layer:
+        # Grow the smaller frontier. No path is shorter than the layers
+        # searched so far, so the first meeting gives a shortest path
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, key = _grow(forward_layer, forward, backward,
+                                       False, stats)
+        else:
+            backward_layer, key = _grow(backward_layer, backward, forward,
+                                        True, stats)
+        if stats is not None:
+            stats._reached(len(forward_layer) + len(backward_layer),
+                           len(forward) + len(backward))
+        if key is not None:
+            node = forward[key]
+            # Follow the goal side of the path, re-parenting each step
+            back = backward[key].parent
+            while back is not None:
+                node = PuzzleNode(back.puzzle, None, node)
+                back = back.parent
+            return _solution_path(node)
+    return None
+
+
+def _grow(layer, reached, other, reverse, stats=None):
+    """
+    Return the next layer of a breadth first search from the nodes in
+    layer, stopping early with the configuration of the first node that
+    is also in other.
+
+    Every new node is added to reached. If reverse is True the search
+    follows reverse_extensions instead of extensions. If stats is not
+    None, the search is recorded in it.
+
+    @type layer: list[PuzzleNode]
+    @type reached: dict[object, PuzzleNode]
+    @type other: dict[object, PuzzleNode]
+    @type reverse: bool
+    @type stats: SearchStats | None
+    @rtype: (list[PuzzleNode], object | None)
+    """
+    _, fail_fast, _ = _probes(stats)
+    next_layer = []
+    for node in layer:
+        if stats is not None:
+            extensions = stats._extensions(node.puzzle, reverse)
+        elif reverse:
+            extensions = node.puzzle.reverse_extensions()
+        else:
+            extensions = node.puzzle.extensions()
+        for extension in extensions:
+            key = extension.state_key()
+            if key in reached:
+                if stats is not None:
+                    stats.duplicates_pruned += 1
+                continue
+            # Configurations that lead to the goal never fail fast
+            if not reverse and fail_fast(extension):
+                continue
+            reached[key] = PuzzleNode(extension, None, node)
+            if key in other:
+                return next_layer, key
+            next_layer.append(reached[key])
+    return next_layer, None
+
+
+def _probes(stats):
+    """
+    Return the functions a solver should call to expand a PuzzleNode,
+    and to ask whether a Puzzle fails fast or is solved: the plain
+    methods if stats is None, otherwise ones recording their calls in
+    stats.
+
+    @type stats: SearchStats | None
+    @rtype: ((PuzzleNode) -> generator[PuzzleNode], (Puzzle) -> bool,
+             (Puzzle) -> bool)
+    """
+    if stats is None:
+        return PuzzleNode.expand, _FAIL_FAST, _IS_SOLVED
+    return stats._expand, stats._fail_fast, stats._is_solved
+
+
+def _budgeted(search, budget, stats, heuristic, proven=True):
+    """
+    Return a SearchResult for calling search with a SearchStats that
+    stops it once budget is spent, noting the configuration with the
+    lowest heuristic chosen for expansion, and add the work done to
+    stats if it is not None.
+
+    A search that returns None is reported as proving that there is no
+    solution only if proven is True.
+
+    @type search: (SearchStats) -> PuzzleNode | None
+    @type budget: Budget
+    @type stats: SearchStats | None
+    @type heuristic: (Puzzle) -> int
+    @type proven: bool
+    @rtype: SearchResult
+    """
+    monitor = _Monitor(budget, heuristic)
+    try:
+        solution = search(monitor)
+    except _BudgetSpent:
+        status, solution = SearchResult.EXHAUSTED, None
+    else:
+        if solution is not None:
+            status = SearchResult.SOLVED
+        elif proven:
+            status = SearchResult.UNSOLVABLE
+        else:
+            status = SearchResult.EXHAUSTED
+    if stats is not None:
+        stats._add(monitor)
+    best = monitor.best
+    if solution is not None:
+        best = solution
+        while best.children:
+            best = best.children[0]
+        best = best.puzzle
+    return SearchResult(status, solution, best)
+
+
+def _depth(node):
+    """
+    Return the number of ancestors of PuzzleNode node.
+
+    @type node: PuzzleNode
+    @rtype: int
+    """
+    depth = 0
+    while node.parent is not None:
+        node, depth = node.parent, depth + 1
+    return depth
+
+
+def _replay(puzzle, keys):
+    """
+    Return the root of a path of PuzzleNodes from PuzzleNode(puzzle),
+    where each child holds the first extension of the puzzle in its
+    parent with the next canonical key of keys.
+
+    Configurations with equal canonical keys have extensions with the
+    same canonical keys, so any path of keys found from puzzle can be
+    followed again from puzzle.
+
+    @type puzzle: Puzzle
+    @type keys: list[object]
+    @rtype: PuzzleNode
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "dot"}
+    >>> print(_replay(WordLadderPuzzle("cat", "dot", ws), ["cot", "dot"]))
+    cat -> dot
+    <BLANKLINE>
+    cot -> dot
+    <BLANKLINE>
+    dot -> dot
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    root = node = PuzzleNode(puzzle)
+    for key in keys:
+        for extension in node.puzzle.extensions():
+            if extension.canonical_key() == key:
+                break
+        else:
+            raise ValueError("no extension has key {!r}".format(key))
+        node.children = [PuzzleNode(extension, None, node)]
+        node = node.children[0]
+    return root
+
+
+def _copy_path(node):
+    """
+    Return the root of a new path of PuzzleNodes holding the puzzles
+    from the root of node's tree to node, leaving node's tree unchanged.
+
+    @type node: PuzzleNode
+    @rtype: PuzzleNode
+    """
+    copy = PuzzleNode(node.puzzle)
+    while node.parent is not None:
+        node = node.parent
+        copy.parent = PuzzleNode(node.puzzle, [copy])
+        copy = copy.parent
+    return copy
+
+
+def _solution_path(node):
+    """
+    Return the root of the path from the root of node's tree to node,
+    with each PuzzleNode on the path having its successor as its only
+    child.
+
+    @type node: PuzzleNode
+    @rtype: PuzzleNode
+    """
+    node.children = []
+    # Go up the path that we took, linking each parent to its child
+    while node.parent is not None:
+        node.parent.children = [node]
+        node = node.parent
+    return node
+
+class SearchStats:
+    """
+    A record of the work done by solvers searching for a solution.
+
+    Pass a SearchStats to a solver to have it filled in; the same
+    SearchStats passed to several searches accumulates over all of them.
+    Solvers given no SearchStats gather nothing, and pay almost nothing
+    for the option.
+
+    nodes_expanded - configurations whose extensions were generated
+    nodes_generated - extensions generated
+    duplicates_pruned - extensions dropped as already visited
+    fail_fast_rejections - configurations dropped because they fail fast
+    max_frontier - most configurations waiting to be searched at once
+    peak_visited - most entries in the table of visited configurations
+    extensions_time - seconds spent generating extensions
+    is_solved_time - seconds spent in is_solved
+    fail_fast_time - seconds spent in fail_fast
+
+    === Attributes ===
+    @type nodes_expanded: int
+    @type nodes_generated: int
+    @type duplicates_pruned: int
+    @type fail_fast_rejections: int
+    @type max_frontier: int
+    @type peak_visited: int
+    @type extensions_time: float
+    @type is_solved_time: float
+    @type fail_fast_time: float
+    """
+
+    def __init__(self):
+        """
+        Create a new SearchStats self recording no work yet.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.nodes_expanded, self.nodes_generated = 0, 0
+        self.duplicates_pruned, self.fail_fast_rejections = 0, 0
+        self.max_frontier, self.peak_visited = 0, 0
+        self.extensions_time, self.is_solved_time = 0.0, 0.0
+        self.fail_fast_time = 0.0
+
+    def __str__(self):
+        """
+        Return a human-readable string representing SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> stats = SearchStats()
+        >>> sol = depth_first_solve(WordLadderPuzzle("ab", "bb", {"bb"}),
+        ...                         None, stats)
+        >>> print(str(stats).split(", time")[0])
+        1 generated from 1 expanded, 0 duplicates, 0 failed fast, \
+frontier 1, visited 2
+        """
+        return ("{} generated from {} expanded, {} duplicates, {} failed "
+                "fast, frontier {}, visited {}, time in extensions {:.3f}s, "
+                "is_solved {:.3f}s, fail_fast {:.3f}s").format(
+                    self.nodes_generated, self.nodes_expanded,
+                    self.duplicates_pruned, self.fail_fast_rejections,
+                    self.max_frontier, self.peak_visited,
+                    self.extensions_time, self.is_solved_time,
+                    self.fail_fast_time)
+
+    def _extensions(self, puzzle, reverse=False):
+        """
+        Generate the extensions of puzzle, or its reverse_extensions if
+        reverse is True, recording the work in SearchStats self.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @type reverse: bool
+        @rtype: generator[Puzzle]
+        """
+        self.nodes_expanded += 1
+        start = perf_counter()
+        if reverse:
+            extensions = iter(puzzle.reverse_extensions())
+        else:
+            extensions = iter(puzzle.extensions())
+        # extensions may be generated lazily, so time each one separately
+        # and leave the time spent by the solver between them out
+        extension = next(extensions, None)
+        self.extensions_time += perf_counter() - start
+        while extension is not None:
+            self.nodes_generated += 1
+            yield extension
+            start = perf_counter()
+            extension = next(extensions, None)
+            self.extensions_time += perf_counter() - start
+
+    def _expand(self, node):
+        """
+        Generate a PuzzleNode with parent node for each extension of
+        node.puzzle, as PuzzleNode.expand does, recording the work in
+        SearchStats self.
+
+        @type self: SearchStats
+        @type node: PuzzleNode
+        @rtype: generator[PuzzleNode]
+        """
+        for extension in self._extensions(node.puzzle):
+            yield PuzzleNode(extension, None, node)
+
+    def _fail_fast(self, puzzle):
+        """
+        Return puzzle.fail_fast(), recording the call in SearchStats self.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        result = puzzle.fail_fast()
+        self.fail_fast_time += perf_counter() - start
+        if result:
+            self.fail_fast_rejections += 1
+        return result
+
+    def _is_solved(self, puzzle):
+        """
+        Return puzzle.is_solved(), recording the call in SearchStats self.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        result = puzzle.is_solved()
+        self.is_solved_time += perf_counter() - start
+        return result
+
+    def _reached(self, frontier, visited):
+        """
+        Record that a search has frontier configurations waiting to be
+        searched and visited entries in its table of visited
+        configurations.
+
+        @type self: SearchStats
+        @type frontier: int
+        @type visited: int
+        @rtype: None
+        """
+        if frontier > self.max_frontier:
+            self.max_frontier = frontier
+        if visited > self.peak_visited:
+            self.peak_visited = visited
+
+    def _add(self, other):
+        """
+        Add the work recorded in SearchStats other to SearchStats self.
+
+        @type self: SearchStats
+        @type other: SearchStats
+        @rtype: None
+        """
+        self.nodes_expanded += other.nodes_expanded
+        self.nodes_generated += other.nodes_generated
+        self.duplicates_pruned += other.duplicates_pruned
+        self.fail_fast_rejections += other.fail_fast_rejections
+        self._reached(other.max_frontier, other.peak_visited)
+        self.extensions_time += other.extensions_time
+        self.is_solved_time += other.is_solved_time
+        self.fail_fast_time += other.fail_fast_time
+
+
+class Budget:
+    """
+    Limits on the work a solver may do before giving up, each None if
+    unlimited.
+
+    seconds - wall-clock time since the search started
+    nodes - configurations whose extensions are generated
+    visited - entries in the table of visited configurations
+
+    === Attributes ===
+    @type seconds: float | None
+    @type nodes: int | None
+    @type visited: int | None
+    """
+
+    def __init__(self, seconds=None, nodes=None, visited=None):
+        """
+        Create a new Budget self with the given limits.
+
+        @type self: Budget
+        @type seconds: float | None
+        @type nodes: int | None
+        @type visited: int | None
+        @rtype: None
+        """
+        self.seconds, self.nodes, self.visited = seconds, nodes, visited
+
+
+class SearchResult:
+    """
+    The outcome of a search given a Budget.
+
+    status is SOLVED if a solution was found, UNSOLVABLE if the search
+    proved that there is none, and EXHAUSTED if it stopped first.
+    solution is the path found, if any. best is the solved
+    configuration if there is one, otherwise the configuration with the
+    lowest heuristic of those the search chose to expand, the one
+    furthest from the start among ties, or None if there were none.
+
+    === Attributes ===
+    @type status: str
+    @type solution: PuzzleNode | None
+    @type best: Puzzle | None
+    """
+    SOLVED, UNSOLVABLE, EXHAUSTED = "solved", "unsolvable", "exhausted"
+
+    def __init__(self, status, solution, best):
+        """
+        Create a new SearchResult self.
+
+        @type self: SearchResult
+        @type status: str
+        @type solution: PuzzleNode | None
+        @type best: Puzzle | None
+        @rtype: None
+        """
+        self.status, self.solution, self.best = status, solution, best
+
+
+class _BudgetSpent(Exception):
+    """
+    Raised to stop a search whose Budget is spent.
+    """
+
+
+class _Monitor(SearchStats):
+    """
+    A SearchStats that stops the search recording in it once a Budget
+    is spent, and keeps the configuration with the lowest heuristic
+    chosen for expansion.
+
+    Among ties, the configuration furthest from the start is kept, so
+    that a puzzle whose heuristic is always 0 still reports how far the
+    search got. Searches that expand PuzzleNodes are measured by the
+    length of each node's path; the others expand configurations in
+    order of their distance from the start, so the latest is kept.
+
+    === Attributes ===
+    @type best: Puzzle | None
+    """
+
+    def __init__(self, budget, heuristic):
+        """
+        Create a new _Monitor self for a search starting now with budget,
+        judging configurations by heuristic.
+
+        @type self: _Monitor
+        @type budget: Budget
+        @type heuristic: (Puzzle) -> int
+        @rtype: None
+        """
+        SearchStats.__init__(self)
+        self.best, self._lowest = None, None
+        # the number of extensions from the start to best, if known and
+        # worked out
+        self._depth = None
+        self._budget, self._heuristic = budget, heuristic
+        self._started = perf_counter()
+
+    def _note(self, puzzle, node=None):
+        """
+        Note puzzle, about to be expanded, as the best configuration if it
+        is, where node, if not None, is the PuzzleNode holding it.
+
+        @type self: _Monitor
+        @type puzzle: Puzzle
+        @type node: PuzzleNode | None
+        @rtype: None
+        """
+        h = self._heuristic(puzzle)
+        if self._lowest is None or h < self._lowest:
+            self.best, self._lowest = puzzle, h
+            self._depth = None if node is None else _depth(node)
+        elif h == self._lowest:
+            if node is None:
+                self.best = puzzle
+            else:
+                depth = _depth(node)
+                if self._depth is None or depth > self._depth:
+                    self.best, self._depth = puzzle, depth
+
+    def _expand(self, node):
+        """
+        Generate the PuzzleNodes SearchStats._expand(self, node) does,
+        first noting node.puzzle as the best configuration if it is.
+
+        @type self: _Monitor
+        @type node: PuzzleNode
+        @rtype: generator[PuzzleNode]
+        """
+        self._note(node.puzzle, node)
+        for extension in self._spend(node.puzzle, False):
+            yield PuzzleNode(extension, None, node)
+
+    def _extensions(self, puzzle, reverse=False):
+        """
+        Return SearchStats._extensions(self, puzzle, reverse), first
+        noting puzzle as the best configuration if it is, and raising
+        _BudgetSpent instead if _Monitor self's budget of time or
+        expanded nodes is spent.
+
+        @type self: _Monitor
+        @type puzzle: Puzzle
+        @type reverse: bool
+        @rtype: generator[Puzzle]
+        """
+        if not reverse:
+            # configurations reached backwards from the goal are not on
+            # the way to it from the start
+            self._note(puzzle)
+        return self._spend(puzzle, reverse)
+
+    def _spend(self, puzzle, reverse):
+        """
+        Return SearchStats._extensions(self, puzzle, reverse), raising
+        _BudgetSpent instead if _Monitor self's budget of time or
+        expanded nodes is spent.
+
+        @type self: _Monitor
+        @type puzzle: Puzzle
+        @type reverse: bool
+        @rtype: generator[Puzzle]
+        """
+        budget = self._budget
+        if ((budget.nodes is not None and
+             self.nodes_expanded >= budget.nodes) or
+                (budget.seconds is not None and
+                 perf_counter() - self._started >= budget.seconds)):
+            raise _BudgetSpent
+        return SearchStats._extensions(self, puzzle, reverse)
+
+    def _reached(self, frontier, visited):
+        """
+        Record frontier and visited as SearchStats._reached does, raising
+        _BudgetSpent if visited exceeds _Monitor self's budget.
+
+        @type self: _Monitor
+        @type frontier: int
+        @type visited: int
+        @rtype: None
+        """
+        SearchStats._reached(self, frontier, visited)
+        if self._budget.visited is not None and \
+                visited > self._budget.visited:
+            raise _BudgetSpent
 
-    configs_seen = set()
-    queue = deque()
-    ext = [i for i in puzzle.extensions()]
-    p_node = PuzzleNode(puzzle, ext)
-    queue.append(p_node)
-    return search_queue(queue, configs_seen)
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
 # an arbitrary number of children, and a parent.
@@ -159,6 +965,31 @@ class PuzzleNode:
         else:
             self.children = children[:]
 
+    def expand(self):
+        """
+        Generate a PuzzleNode with parent self for each extension of
+        self.puzzle.
+
+        Extensions are produced on demand and are not stored in
+        self.children, so a node being searched holds no reference to
+        its children once the caller is done with them.
+
+        @type self: PuzzleNode
+        @rtype: generator[PuzzleNode]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> pn = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no", "oo"}))
+        >>> children = list(pn.expand())
+        >>> "oo -> no" in [str(child.puzzle) for child in children]
+        True
+        >>> all([child.parent is pn for child in children])
+        True
+        >>> pn.children
+        []
+        """
+        for extension in self.puzzle.extensions():
+            yield PuzzleNode(extension, None, self)
+
     def __eq__(self, other):
         """
         Return whether Puzzle self is equivalent to other
@@ -175,11 +1006,30 @@ class PuzzleNode:
         True
         >>> pn1.__eq__(pn3)
         False
+        >>> PuzzleNode(0, [pn1, pn3]) == PuzzleNode(0, [pn3, pn2])
+        True
+        >>> path1, path2 = PuzzleNode(0), PuzzleNode(0)
+        >>> for node in (path1, path2):
+        ...     for i in range(1, 5000):
+        ...         node.children = [PuzzleNode(i, None, node)]
+        ...         node = node.children[0]
+        >>> path1 == path2
+        True
+        >>> node.puzzle = -1
+        >>> path1 == path2
+        False
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        # follow chains of only children in a loop, so that long solution
+        # paths do not exhaust the recursion limit; only nodes with several
+        # children recurse, to compare their children as collections
+        node = self
+        while True:
+            if type(node) != type(other) or node.puzzle != other.puzzle:
+                return False
+            if len(node.children) != 1 or len(other.children) != 1:
+                return (all([x in node.children for x in other.children]) and
+                        all([x in other.children for x in node.children]))
+            node, other = node.children[0], other.children[0]
 
     def __str__(self):
         """
@@ -187,8 +1037,21 @@ class PuzzleNode:
 
         # doctest not feasible.
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        # Equivalent to formatting self.puzzle followed by the children
+        # joined by newlines, but built with an explicit stack so that
+        # long solution paths do not exhaust the recursion limit
+        pieces, stack = [], [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                pieces.append(item)
+            else:
+                pieces.append("{}\n\n".format(item.puzzle))
+                for i in range(len(item.children) - 1, -1, -1):
+                    stack.append(item.children[i])
+                    if i > 0:
+                        stack.append("\n")
+        return "".join(pieces)
 
 if __name__ == "__main__":
     import doctest
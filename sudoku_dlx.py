@@ -0,0 +1,359 @@
+"""
+Solve SudokuPuzzles of any size as exact cover problems, using Knuth's
+Algorithm X with dancing links
+"""
+from sudoku_puzzle import SudokuPuzzle
+from puzzle_tools import PuzzleNode
+
+
+class _ExactCover:
+    """
+    The exact cover matrix of a SudokuPuzzle, as circular doubly linked
+    lists of nodes stored in parallel lists. Node 0 is the root, nodes
+    1 to columns are column headers, and every other node is a 1 in the
+    matrix.
+    """
+
+    def __init__(self, columns, rows):
+        """
+        Create a new _ExactCover self with columns columns and a row for
+        each list of column numbers (1 to columns) in rows.
+
+        @type self: _ExactCover
+        @type columns: int
+        @type rows: list[list[int]]
+        @rtype: None
+        """
+        self.left = [i - 1 for i in range(columns + 1)]
+        self.right = [i + 1 for i in range(columns + 1)]
+        self.left[0], self.right[columns] = columns, 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.row = [-1] * (columns + 1)
+        self.size = [0] * (columns + 1)
+        for row, row_columns in enumerate(rows):
+            first = len(self.left)
+            for i, c in enumerate(row_columns):
+                node = first + i
+                self.left.append(node - 1 if i > 0 else
+                                 first + len(row_columns) - 1)
+                self.right.append(node + 1 if i < len(row_columns) - 1 else
+                                  first)
+                # insert node at the bottom of column c
+                self.up.append(self.up[c])
+                self.down.append(c)
+                self.down[self.up[c]] = node
+                self.up[c] = node
+                self.column.append(c)
+                self.row.append(row)
+                self.size[c] += 1
+
+    def cover(self, c):
+        """
+        Remove column c, and every row with a 1 in it, from _ExactCover
+        self.
+
+        @type self: _ExactCover
+        @type c: int
+        @rtype: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        right[left[c]], left[right[c]] = right[c], left[c]
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]], up[down[j]] = down[j], up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, c):
+        """
+        Undo cover(c) on _ExactCover self.
+
+        @type self: _ExactCover
+        @type c: int
+        @rtype: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[c]] = left[right[c]] = c
+
+    def solutions(self, stats=None):
+        """
+        Generate every exact cover of _ExactCover self, each as the list
+        of its rows in the order they were chosen.
+
+        This is Algorithm X with an explicit stack, always branching on
+        the column with the fewest 1s. If stats is not None, each column
+        branched on is counted in it as a node expanded, and each row
+        tried as a node generated.
+
+        @type self: _ExactCover
+        @type stats: SearchStats | None
+        @rtype: generator[list[int]]
+        """
+        right, down = self.right, self.down
+        if right[0] == 0:
+            yield []
+            return
+        # the column and row node chosen at each level of the search
+        stack = []
+        c = self._smallest()
+        self.cover(c)
+        if stats is not None:
+            stats.nodes_expanded += 1
+        r = down[c]
+        while True:
+            if r != c:
+                if stats is not None:
+                    stats.nodes_generated += 1
+                stack.append((c, r))
+                j = right[r]
+                while j != r:
+                    self.cover(self.column[j])
+                    j = right[j]
+                if right[0] == 0:
+                    yield [self.row[node] for _, node in stack]
+                elif self.size[self._smallest()] > 0:
+                    c = self._smallest()
+                    self.cover(c)
+                    if stats is not None:
+                        stats.nodes_expanded += 1
+                    r = down[c]
+                    continue
+                # row r cannot be extended further, so try the next one
+                c, r = stack.pop()
+                self._uncover_row(r)
+                r = down[r]
+            else:
+                # every row of column c has been tried
+                self.uncover(c)
+                if not stack:
+                    return
+                c, r = stack.pop()
+                self._uncover_row(r)
+                r = down[r]
+
+    def _smallest(self):
+        """
+        Return the remaining column of _ExactCover self with the fewest 1s.
+
+        @type self: _ExactCover
+        @rtype: int
+        """
+        right, size = self.right, self.size
+        best, c = right[0], right[right[0]]
+        while c != 0 and size[best] > 1:
+            if size[c] < size[best]:
+                best = c
+            c = right[c]
+        return best
+
+    def _uncover_row(self, r):
+        """
+        Uncover the columns of the row of node r other than its own, in
+        the reverse of the order they were covered.
+
+        @type self: _ExactCover
+        @type r: int
+        @rtype: None
+        """
+        j = self.left[r]
+        while j != r:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+
+def _placements(puzzle, stats=None):
+    """
+    Generate each way of filling the empty positions of SudokuPuzzle
+    puzzle, as the list of (position, symbol) placements in the order
+    they were chosen, counting the search in stats if it is not None.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: SearchStats | None
+    @rtype: generator[list[(int, str)]]
+    """
+    n, symbols, symbol_set = puzzle._n, puzzle._symbols, puzzle._symbol_set
+    r = round(n ** (1 / 2))
+    order = sorted(symbol_set)
+    # one column for each position, and for each symbol in each row,
+    # column and subsquare, numbered from 1
+    constraints = {}
+    for kind in ("position", "row", "column", "subsquare"):
+        for i in range(n):
+            for j in range(n):
+                constraints[(kind, i, j)] = len(constraints) + 1
+    for m in range(n ** 2):
+        if symbols[m] != "*":
+            row, column = m // n, m % n
+            subsquare = (row // r) * r + column // r
+            for key in [("position", row, column),
+                        ("row", row, order.index(symbols[m])),
+                        ("column", column, order.index(symbols[m])),
+                        ("subsquare", subsquare, order.index(symbols[m]))]:
+                if key not in constraints:
+                    # a symbol given twice in one row, column or subsquare
+                    return
+                del constraints[key]
+    # renumber the constraints that the given symbols leave open
+    numbers = {key: i + 1 for i, key in enumerate(sorted(
+        constraints, key=constraints.get))}
+    rows, placements = [], []
+    for m in range(n ** 2):
+        if symbols[m] == "*":
+            row, column = m // n, m % n
+            subsquare = (row // r) * r + column // r
+            for s in range(n):
+                keys = [("position", row, column), ("row", row, s),
+                        ("column", column, s), ("subsquare", subsquare, s)]
+                if all([key in numbers for key in keys]):
+                    rows.append([numbers[key] for key in keys])
+                    placements.append((m, order[s]))
+    for solution in _ExactCover(len(numbers), rows).solutions(stats):
+        yield [placements[i] for i in solution]
+
+
+def dlx_iter_solutions(puzzle):
+    """
+    Generate every solution of SudokuPuzzle puzzle as a solved
+    SudokuPuzzle.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: generator[SudokuPuzzle]
+
+    >>> grid = ["*", "B", "C", "*"]
+    >>> grid += ["C", "*", "A", "*"]
+    >>> grid += ["B", "*", "*", "*"]
+    >>> grid += ["*", "C", "*", "*"]
+    >>> for s in dlx_iter_solutions(SudokuPuzzle(4, grid, set("ABCD"))):
+    ...     print(s)
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    """
+    for placements in _placements(puzzle):
+        symbols = puzzle._symbols[:]
+        for m, symbol in placements:
+            symbols[m] = symbol
+        yield SudokuPuzzle(puzzle._n, symbols, puzzle._symbol_set)
+
+
+def dlx_count_solutions(puzzle, limit=None):
+    """
+    Return the number of solutions of SudokuPuzzle puzzle, counting no
+    further than limit if it is not None.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int | None
+    @rtype: int
+
+    >>> dlx_count_solutions(SudokuPuzzle(4, ["*"] * 16, set("ABCD")))
+    288
+    >>> dlx_count_solutions(SudokuPuzzle(4, ["*"] * 16, set("ABCD")), 2)
+    2
+    >>> dlx_count_solutions(SudokuPuzzle(4, ["A", "A"] + ["*"] * 14,
+    ...                                  set("ABCD")))
+    0
+    """
+    count = 0
+    for _ in _placements(puzzle):
+        count += 1
+        if count == limit:
+            break
+    return count
+
+
+def dlx_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing the puzzle in its
+    parent with one more empty position filled.  Return None if this is
+    not possible. If stats is not None, the search is counted in it as
+    _ExactCover.solutions counts it.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | None
+
+    >>> grid = ["*", "B", "C", "D"]
+    >>> grid += ["C", "D", "A", "B"]
+    >>> grid += ["B", "A", "D", "C"]
+    >>> grid += ["D", "C", "B", "*"]
+    >>> print(dlx_solve(SudokuPuzzle(4, grid, set("ABCD"))))
+    *B|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|B*
+    <BLANKLINE>
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|B*
+    <BLANKLINE>
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> from puzzle_tools import SearchStats
+    >>> stats = SearchStats()
+    >>> _ = dlx_solve(SudokuPuzzle(4, grid, set("ABCD")), stats)
+    >>> stats.nodes_expanded, stats.nodes_generated
+    (2, 2)
+    """
+    for placements in _placements(puzzle, stats):
+        symbols = puzzle._symbols[:]
+        root = node = PuzzleNode(puzzle)
+        for m, symbol in placements:
+            symbols = symbols[:]
+            symbols[m] = symbol
+            child = PuzzleNode(SudokuPuzzle(puzzle._n, symbols,
+                                            puzzle._symbol_set), None, node)
+            node.children = [child]
+            node = child
+        return root
+    return None
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    import random
+    from time import time
+    for n in (9, 16, 25):
+        r = round(n ** (1 / 2))
+        symbols = [chr(ord("A") + i) for i in range(n)]
+        # a solved grid from the usual shifted pattern, with about half of
+        # its positions chosen at random kept
+        rand = random.Random(0)
+        grid = [symbols[(r * (i % r) + i // r + j) % n]
+                if rand.random() < 0.5 else "*"
+                for i in range(n) for j in range(n)]
+        s = SudokuPuzzle(n, grid, set(symbols))
+        start = time()
+        solution = dlx_solve(s)
+        end = time()
+        while solution.children:
+            solution = solution.children[0]
+        print("solved {0}x{0} using dancing links in {1} seconds".format(
+            n, end - start))
+        assert solution.puzzle.is_solved()
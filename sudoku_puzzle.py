@@ -1,20 +1,100 @@
 from puzzle import Puzzle
 
+# map each symbol to a small integer code, with one table per symbol set
+# shared by every SudokuPuzzle using that set
+_symbol_codes = {}
+# the row, column and subsquare of each position, one table per n
+_unit_tables = {}
+# the positions in each row, column and subsquare, one table per n
+_unit_position_tables = {}
+
+
+def _codes(symbol_set):
+    """
+    Return the table of symbol codes for symbol_set, with "*" coded as 0,
+    and the list of symbols indexed by code.
+
+    Symbol code k > 0 is represented by bit 1 << (k - 1) in the masks
+    of symbols used by each row, column and subsquare.
+
+    @type symbol_set: set[str]
+    @rtype: (dict[str, int], list[str])
+    """
+    symbols = frozenset(symbol_set)
+    codes = _symbol_codes.get(symbols)
+    if codes is None:
+        codes = {"*": 0}
+        for symbol in sorted(symbols):
+            codes[symbol] = len(codes)
+        codes = _symbol_codes[symbols] = (codes, ["*"] + sorted(symbols))
+    return codes
+
+
+def _units(n):
+    """
+    Return the row, column and subsquare of each position of an nxn
+    SudokuPuzzle.
+
+    @type n: int
+    @rtype: list[(int, int, int)]
+
+    >>> _units(4)[:6]
+    [(0, 0, 0), (0, 1, 0), (0, 2, 1), (0, 3, 1), (1, 0, 0), (1, 1, 0)]
+    """
+    units = _unit_tables.get(n)
+    if units is None:
+        r = round(n ** (1 / 2))
+        units = _unit_tables[n] = [
+            (m // n, m % n, (m // n // r) * r + (m % n) // r)
+            for m in range(n ** 2)]
+    return units
+
+
+def _unit_positions(n):
+    """
+    Return the positions in each row, then each column, then each
+    subsquare of an nxn SudokuPuzzle.
+
+    @type n: int
+    @rtype: list[list[int]]
+
+    >>> _unit_positions(4)[0], _unit_positions(4)[4], _unit_positions(4)[8]
+    ([0, 1, 2, 3], [0, 4, 8, 12], [0, 1, 4, 5])
+    """
+    positions = _unit_position_tables.get(n)
+    if positions is None:
+        positions = [[] for _ in range(3 * n)]
+        for m, (row, column, subsquare) in enumerate(_units(n)):
+            positions[row].append(m)
+            positions[n + column].append(m)
+            positions[2 * n + subsquare].append(m)
+        _unit_position_tables[n] = positions
+    return positions
+
 
 class SudokuPuzzle(Puzzle):
     """
     A sudoku puzzle that may be solved, unsolved, or even unsolvable.
     """
 
-    def __init__(self, n, symbols, symbol_set):
+    def __init__(self, n, symbols, symbol_set, mrv=False, propagate=False):
         """
         Create a new nxn SudokuPuzzle self with symbols
         from symbol_set already selected.
 
+        If mrv is True, extensions fill the empty position with the fewest
+        allowed symbols rather than the first one. If propagate is True,
+        extensions first fill every position forced by naked singles (a
+        position with one allowed symbol) and hidden singles (a symbol
+        with one allowed position in a row, column or subsquare). Both
+        options carry over to the extensions.
+
         @type self: SudokuPuzzle
         @type n: int
         @type symbols: list[str]
         @type symbol_set: set[str]
+        @type mrv: bool
+        @type propagate: bool
         """
         assert n > 0
         assert round(n ** (1 / 2)) * round(n ** (1 / 2)) == n
@@ -22,6 +102,17 @@ class SudokuPuzzle(Puzzle):
         assert len(symbol_set) == n
         assert len(symbols) == n ** 2
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
+        self._mrv, self._propagate = mrv, propagate
+        # masks of the symbols already used by each row, column and
+        # subsquare, with the bit for each symbol given by _codes
+        codes = _codes(symbol_set)[0]
+        self._rows, self._columns, self._subsquares = [0] * n, [0] * n, [0] * n
+        for m, (row, column, subsquare) in enumerate(_units(n)):
+            if symbols[m] != "*":
+                bit = 1 << (codes[symbols[m]] - 1)
+                self._rows[row] |= bit
+                self._columns[column] |= bit
+                self._subsquares[subsquare] |= bit
 
     def __eq__(self, other):
         """
@@ -111,6 +202,33 @@ class SudokuPuzzle(Puzzle):
         rows = table_dividers(rows)
         return "\n".join(rows)
 
+    def __hash__(self):
+        """
+        Return a hash of SudokuPuzzle self consistent with __eq__.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return the symbols of SudokuPuzzle self packed one byte per cell.
+
+        @type self: SudokuPuzzle
+        @rtype: bytes
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> list(s.state_key())
+        [1, 2, 3, 4, 4, 3, 2, 1, 0, 4, 0, 0, 0, 0, 0, 0]
+        """
+        return bytes(map(_codes(self._symbol_set)[0].__getitem__,
+                         self._symbols))
+
     def is_solved(self):
         """
         Return whether Puzzle self is solved.
@@ -131,14 +249,13 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # no "*" left and all rows, column, subsquares have correct symbols
-        return ("*" not in symbols and
-                all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(i) == self._symbol_set and
-                      self._subsquare_set(i) ==
-                      self._symbol_set) for i in range(n ** 2)]))
+        # no "*" left and all rows, column, subsquares have correct symbols:
+        # n filled positions can only use all n symbols if none repeats
+        full = (1 << self._n) - 1
+        return ("*" not in self._symbols and
+                all([mask == full for mask in self._rows]) and
+                all([mask == full for mask in self._columns]) and
+                all([mask == full for mask in self._subsquares]))
 
     def extensions(self):
         """
@@ -161,26 +278,49 @@ class SudokuPuzzle(Puzzle):
         True
         >>> all([s in L1 for s in L2])
         True
+        >>> grid = ["*", "B", "C", "*"]
+        >>> grid += ["C", "*", "A", "*"]
+        >>> grid += ["B", "*", "*", "*"]
+        >>> grid += ["*", "C", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"}, True, True)
+        >>> for e in s.extensions(): print(e)
+        AB|CD
+        CD|AB
+        -----
+        BA|DC
+        DC|BA
         """
-        # convenient names
-        symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
-        if "*" not in symbols:
+        puzzle = self
+        if self._propagate:
+            puzzle = self._propagated()
+            if puzzle is None:
+                # some position or symbol has nowhere left to go
+                return []
+            if "*" not in puzzle._symbols:
+                return [puzzle] if puzzle is not self else []
+        if "*" not in puzzle._symbols:
             # return an empty generator
             return [_ for _ in []]
+        elif puzzle._mrv:
+            # position with the fewest allowed symbols
+            i, fewest = -1, puzzle._n + 1
+            for m in range(len(puzzle._symbols)):
+                if puzzle._symbols[m] == "*":
+                    count = bin(puzzle._allowed(m)).count("1")
+                    if count < fewest:
+                        i, fewest = m, count
+                        if count <= 1:
+                            break
         else:
             # position of first empty position
-            i = symbols.index("*")
-            # allowed symbols at position i
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
-            # list of SudokuPuzzles with each legal digit at position i
-            return (
-                [SudokuPuzzle(n,
-                 symbols[:i] + [d] + symbols[i + 1:], symbol_set)
-                 for d in allowed_symbols])
+            i = puzzle._symbols.index("*")
+        # list of SudokuPuzzles with each legal digit at position i
+        ext, allowed = [], puzzle._allowed(i)
+        while allowed:
+            bit = allowed & -allowed
+            allowed ^= bit
+            ext.append(puzzle._extend(i, bit))
+        return ext
 
     def fail_fast(self):
         """
@@ -206,67 +346,113 @@ class SudokuPuzzle(Puzzle):
         """
         # For all empty spaces, check if there is a symbol from the symbol set
         # that is not in the row, column and subsquare as the empty space
-        for i in range(len(self._symbols)):
-            if self._symbols[i] == "*":
-                fail = True
-                for symbol in self._symbol_set:
-                    if not (symbol in self._row_set(i) or symbol in 
-                            self._column_set(i) or symbol in 
-                            self._subsquare_set(i)):
-                        fail = False
-                if fail:
-                    return fail
+        symbols = self._symbols
+        for i in range(len(symbols)):
+            if symbols[i] == "*" and not self._allowed(i):
+                return True
         return False
 
     # some helper methods
-    def _row_set(self, m):
-        #
-        # Return set of symbols in row of SudokuPuzzle self's symbols
-        # where position m occurs.
+    def _allowed(self, m):
+        # Return the mask of symbols that can go in position m, which are
+        # those not yet used in its row, column or subsquare.
         #
         # @type self: SudokuPuzzle
         # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # first position in m's row
-        r = (m // n) * n
-        # set of elements from symbols[r] .. symbols[r+n-1]
-        return set([symbols[r + i] for i in range(n)])
-
-    def _column_set(self, m):
-        # Return set of symbols in column of SudokuPuzzle self's symbols
-        # where position m occurs.
+        # @rtype: int
+        row, column, subsquare = _units(self._n)[m]
+        return ((1 << self._n) - 1) & ~(self._rows[row] |
+                                       self._columns[column] |
+                                       self._subsquares[subsquare])
+
+    def _extend(self, m, bit):
+        # Return a copy of SudokuPuzzle self with the symbol for bit in
+        # empty position m, updating the masks rather than recomputing
+        # them from scratch.
         #
         # @type self: SudokuPuzzle
         # @type m: int
-        assert 0 <= m <= self._n ** 2
-        # convenient names
-        symbols, n = self._symbols, self._n
-        # first position in m's column
-        c = m % n
-        # set of elements from symbols[c], symbols[c + n],
-        # ... symbols[c + (n * (n-1))]
-        return set([symbols[c + (i * n)] for i in range(n)])
-
-    def _subsquare_set(self, m):
-        # Return set of symbols in subsquare of SudokuPuzzle self's symbols
-        # where position m occurs.
+        # @type bit: int
+        # @rtype: SudokuPuzzle
+        child = SudokuPuzzle.__new__(SudokuPuzzle)
+        child._n, child._symbol_set = self._n, self._symbol_set
+        child._mrv, child._propagate = self._mrv, self._propagate
+        child._symbols = self._symbols[:]
+        child._rows = self._rows[:]
+        child._columns = self._columns[:]
+        child._subsquares = self._subsquares[:]
+        child._place(m, bit)
+        return child
+
+    def _place(self, m, bit):
+        # Put the symbol for bit in empty position m of SudokuPuzzle self.
         #
-        # @type self: Sudoku Puzzle
+        # @type self: SudokuPuzzle
         # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # row, column where m occur
-        row, col = m // n, m % n
-        # length of subsquares
-        ss = round(n ** (1 / 2))
-        # upper-left position of m's subsquare
-        ul = (((row // ss) * ss) * n) + ((col // ss) * ss)
-        # return set of symbols from subsquare starting at ul
-        return set(
-            [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
+        # @type bit: int
+        # @rtype: None
+        row, column, subsquare = _units(self._n)[m]
+        self._symbols[m] = _codes(self._symbol_set)[1][bit.bit_length()]
+        self._rows[row] |= bit
+        self._columns[column] |= bit
+        self._subsquares[subsquare] |= bit
+
+    def _propagated(self):
+        # Return SudokuPuzzle self with every naked and hidden single
+        # filled in, repeatedly, until none is left: self if there were
+        # none, otherwise a copy. Return None if a position is left with
+        # no allowed symbol, or a symbol with no allowed position in some
+        # row, column or subsquare.
+        #
+        # @type self: SudokuPuzzle
+        # @rtype: SudokuPuzzle | None
+        puzzle, symbols, n = self, self._symbols, self._n
+        full = (1 << n) - 1
+        changed = True
+        while changed:
+            changed = False
+            for unit, positions in enumerate(_unit_positions(n)):
+                # symbols allowed in at least one, and in at least two,
+                # empty positions of this unit
+                once = twice = 0
+                for m in positions:
+                    if symbols[m] == "*":
+                        allowed = puzzle._allowed(m)
+                        if not allowed:
+                            return None
+                        if not allowed & (allowed - 1):
+                            # naked single
+                            if puzzle is self:
+                                puzzle = self._extend(m, allowed)
+                                symbols = puzzle._symbols
+                            else:
+                                puzzle._place(m, allowed)
+                            changed = True
+                            continue
+                        twice |= once & allowed
+                        once |= allowed
+                if unit < n:
+                    used = puzzle._rows[unit]
+                elif unit < 2 * n:
+                    used = puzzle._columns[unit - n]
+                else:
+                    used = puzzle._subsquares[unit - 2 * n]
+                if full & ~used & ~once:
+                    return None
+                hidden = once & ~twice & ~used
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for m in positions:
+                        if symbols[m] == "*" and puzzle._allowed(m) & bit:
+                            if puzzle is self:
+                                puzzle = self._extend(m, bit)
+                                symbols = puzzle._symbols
+                            else:
+                                puzzle._place(m, bit)
+                            changed = True
+                            break
+        return puzzle
 
 
 if __name__ == "__main__":
@@ -348,3 +534,15 @@ if __name__ == "__main__":
         end - start))
     print(sol)
 
+    s = SudokuPuzzle(9, s._symbols, s._symbol_set, mrv=True, propagate=True)
+    print("solving the same sudoku choosing the most constrained position "
+          "and propagating singles\n")
+    start = time()
+    sol = depth_first_solve(s)
+    branches = 0
+    while sol.children:
+        sol, branches = sol.children[0], branches + 1
+    end = time()
+    print("time to solve 9x9 using depth_first: {} seconds, with {} "
+          "extensions on the solution path\n".format(end - start, branches))
+    print(sol)
@@ -0,0 +1,260 @@
+"""
+An index of a word set for finding the words one letter away from a
+given word, shared by WordLadderPuzzles using that word set, and a
+cached loader for word lists
+"""
+import hashlib
+import os
+import re
+import struct
+import tempfile
+
+# words made only of the letters WordLadderPuzzle changes between
+_USABLE = re.compile(r"[a-z]+\Z")
+# identifies a compiled word list, followed by the SHA-1 of its source
+_MAGIC = b"WORDS1\n"
+
+
+class WordIndex:
+    """
+    A set of words, each filed under the patterns made by replacing one
+    of its letters with "_", so that the words one letter away from a
+    word are found with one dictionary lookup per letter.
+    """
+
+    def __init__(self, words, adjacency=False):
+        """
+        Create a new WordIndex self of words. If adjacency is True the
+        neighbours of every word are also computed up front.
+
+        @type self: WordIndex
+        @type words: iterable[str]
+        @type adjacency: bool
+        @rtype: None
+
+        >>> index = WordIndex(["cat", "cot", "cog", "dog"])
+        >>> len(index), "cot" in index, "cut" in index
+        (4, True, False)
+        """
+        self._words = set(words)
+        # buckets[n][pattern] is the list of words of length n that match
+        # pattern, such as "c_t" for "cat" and "cot"
+        self._buckets = {}
+        for word in self._words:
+            buckets = self._buckets.setdefault(len(word), {})
+            for i in range(len(word)):
+                buckets.setdefault(word[:i] + "_" + word[i + 1:],
+                                   []).append(word)
+        self._adjacency = None
+        if adjacency:
+            self._adjacency = {word: tuple(self.neighbours(word))
+                               for word in self._words}
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordIndex self.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: bool
+        """
+        return word in self._words
+
+    def __iter__(self):
+        """
+        Return an iterator over the words of WordIndex self.
+
+        @type self: WordIndex
+        @rtype: iterator[str]
+        """
+        return iter(self._words)
+
+    def __len__(self):
+        """
+        Return the number of words in WordIndex self.
+
+        @type self: WordIndex
+        @rtype: int
+        """
+        return len(self._words)
+
+    def neighbours(self, word):
+        """
+        Return the words of WordIndex self that differ from word in
+        exactly one letter. word itself need not be in self.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: list[str] | tuple[str]
+
+        >>> index = WordIndex(["cat", "cot", "cog", "dog"])
+        >>> sorted(index.neighbours("cot"))
+        ['cat', 'cog']
+        >>> sorted(index.neighbours("dot"))
+        ['cot', 'dog']
+        >>> index = WordIndex(["cat", "cot", "cog", "dog"], adjacency=True)
+        >>> sorted(index.neighbours("cog"))
+        ['cot', 'dog']
+        """
+        if self._adjacency is not None and word in self._adjacency:
+            return self._adjacency[word]
+        buckets = self._buckets.get(len(word), {})
+        result = []
+        for i in range(len(word)):
+            for other in buckets.get(word[:i] + "_" + word[i + 1:], ()):
+                if other != word:
+                    result.append(other)
+        return result
+
+
+def load_word_buckets(path="words.txt"):
+    """
+    Return the usable words of the word list at path, sorted and grouped
+    by length. Usable words are those made only of lowercase letters.
+
+    The grouped words are compiled to path + ".cache" together with a
+    checksum of the word list, and later calls read the compiled file
+    instead of parsing the word list again, until the word list changes.
+
+    @type path: str
+    @rtype: dict[int, list[str]]
+
+    >>> buckets = load_word_buckets("words.txt")
+    >>> buckets[3][:3]
+    ['ace', 'act', 'add']
+    >>> "A's" in buckets.get(3, []) or "Aachen" in buckets[6]
+    False
+
+    A damaged cache is compiled again.
+
+    >>> import shutil
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = shutil.copy("words.txt", directory)
+    ...     with open(path, "rb") as f:
+    ...         digest = hashlib.sha1(f.read()).digest()
+    ...     with open(path + ".cache", "wb") as f:
+    ...         _ = f.write(_MAGIC + digest + _encode(buckets)[:100])
+    ...     load_word_buckets(path) == buckets
+    True
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha1(source).digest()
+    cache = path + ".cache"
+    try:
+        with open(cache, "rb") as f:
+            compiled = f.read()
+        if compiled.startswith(_MAGIC + digest):
+            return _decode(compiled, len(_MAGIC) + len(digest))
+    except (OSError, ValueError, struct.error):
+        # missing, or damaged by something other than this function
+        pass
+    buckets = {}
+    for word in set(source.decode("utf-8").split()):
+        if _USABLE.match(word):
+            buckets.setdefault(len(word), []).append(word)
+    for words in buckets.values():
+        words.sort()
+    try:
+        # write to a temporary file of this call's own first, so that
+        # readers never see half of it, even with other processes
+        # compiling the same word list at the same time
+        fd, temporary = tempfile.mkstemp(
+            ".tmp", os.path.basename(cache) + ".",
+            os.path.dirname(os.path.abspath(cache)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_MAGIC + digest + _encode(buckets))
+            # mkstemp makes files only their owner can read
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, cache)
+        except OSError:
+            os.remove(temporary)
+            raise
+    except OSError:
+        # the cache is only an optimisation
+        pass
+    return buckets
+
+
+def load_word_set(path="words.txt"):
+    """
+    Return the set of usable words of the word list at path, loaded
+    through the cache of load_word_buckets.
+
+    @type path: str
+    @rtype: set[str]
+
+    >>> word_set = load_word_set("words.txt")
+    >>> "same" in word_set, "A's" in word_set
+    (True, False)
+    """
+    word_set = set()
+    for words in load_word_buckets(path).values():
+        word_set.update(words)
+    return word_set
+
+
+def _encode(buckets):
+    """
+    Return buckets as bytes: the number of lengths, then the length and
+    number of words for each, then the words of each length back to
+    back with no separators.
+
+    @type buckets: dict[int, list[str]]
+    @rtype: bytes
+    """
+    lengths = sorted(buckets)
+    header = [struct.pack("<I", len(lengths))]
+    for length in lengths:
+        header.append(struct.pack("<II", length, len(buckets[length])))
+    return b"".join(header + ["".join(buckets[length]).encode("ascii")
+                              for length in lengths])
+
+
+def _decode(data, offset):
+    """
+    Return the buckets encoded by _encode in data from offset on.
+    Raise ValueError, or struct.error if even the counts are cut short,
+    if data does not end where the counts say.
+
+    @type data: bytes
+    @type offset: int
+    @rtype: dict[int, list[str]]
+
+    >>> data = _encode({2: ["ab", "cd"]})
+    >>> _decode(data, 0)
+    {2: ['ab', 'cd']}
+    >>> _decode(data[:-1], 0)
+    Traceback (most recent call last):
+    ...
+    ValueError: compiled word list is 1 bytes too short
+    """
+    count, = struct.unpack_from("<I", data, offset)
+    offset += 4
+    sizes = []
+    for _ in range(count):
+        sizes.append(struct.unpack_from("<II", data, offset))
+        offset += 8
+    extra = len(data) - offset - sum([length * number
+                                      for length, number in sizes])
+    if extra != 0:
+        raise ValueError("compiled word list is {} bytes too {}".format(
+            abs(extra), "long" if extra > 0 else "short"))
+    buckets = {}
+    for length, number in sizes:
+        text = data[offset:offset + length * number].decode("ascii")
+        offset += length * number
+        buckets[length] = [text[i:i + length]
+                           for i in range(0, len(text), length)]
+    return buckets
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    from time import time
+    start = time()
+    word_set = load_word_set("words.txt")
+    end = time()
+    print("Loaded {} words in {} seconds".format(len(word_set), end - start))
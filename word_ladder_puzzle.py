@@ -1,4 +1,5 @@
 from puzzle import Puzzle
+from word_index import WordIndex, load_word_set
 
 
 class WordLadderPuzzle(Puzzle):
@@ -12,9 +13,12 @@ class WordLadderPuzzle(Puzzle):
         from from_word to to_word using words in ws, changing one
         character at each step.
 
+        ws may be a WordIndex, which finds extensions much faster and
+        can be shared by many WordLadderPuzzles.
+
         @type from_word: str
         @type to_word: str
-        @type ws: set[str]
+        @type ws: set[str] | WordIndex
         @rtype: None
         """
         (self._from_word, self._to_word, self._word_set) = (from_word,
@@ -30,8 +34,7 @@ class WordLadderPuzzle(Puzzle):
         @type other: WordLadderPuzzle
         @rtype: bool
 
-        >>> f = open('words.txt', 'r')
-        >>> word_set = set(f.read().split())
+        >>> word_set = load_word_set('words.txt')
         >>> s = WordLadderPuzzle("mule", "zoom", word_set)
         >>> t = WordLadderPuzzle("mule", "zoom", word_set)
         >>> s == t
@@ -52,8 +55,7 @@ class WordLadderPuzzle(Puzzle):
         @type self: WordLadderPuzzle
         @rtype: str
         
-        >>> f = open('words.txt', 'r')
-        >>> word_set = set(f.read().split())
+        >>> word_set = load_word_set('words.txt')
         >>> s = WordLadderPuzzle("mule", "zoom", word_set)
         >>> print(s)
         mule -> zoom
@@ -80,6 +82,27 @@ class WordLadderPuzzle(Puzzle):
         """
         return "{} -> {}".format(self._from_word, self._to_word)
 
+    def __hash__(self):
+        """
+        Return a hash of <self> consistent with __eq__.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def state_key(self):
+        """
+        Return the current word of <self>, which identifies its state.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> WordLadderPuzzle("cab", "mow", {"cab", "mow"}).state_key()
+        'cab'
+        """
+        return self._from_word
+
     def extensions(self):
         """
         Return list of extensions of WordLadderPuzzle self.
@@ -95,11 +118,19 @@ class WordLadderPuzzle(Puzzle):
         >>> new = WordLadderPuzzle('mow', 'mow', word_set)
         >>> new in w.extensions()
         False
+        >>> index = WordIndex(word_set)
+        >>> w = WordLadderPuzzle('cab', 'mow', index)
+        >>> sorted([str(e) for e in w.extensions()])
+        ['cap -> mow', 'cat -> mow', 'lab -> mow', 'tab -> mow']
         """
         # override extensions
         # legal extensions are WordPadderPuzzles that have a from_word that can
         # be reached from this one by changing a single letter to one of those
         # in self._chars
+        if isinstance(self._word_set, WordIndex):
+            # the index already knows the words one letter away
+            return [WordLadderPuzzle(word, self._to_word, self._word_set)
+                    for word in self._word_set.neighbours(self._from_word)]
         ext = []
         for char in self._chars:
             for index in range(len(self._from_word)):
@@ -111,6 +142,41 @@ class WordLadderPuzzle(Puzzle):
                                                 self._word_set))
         return ext
 
+    def goal_state(self):
+        """
+        Return the solved WordLadderPuzzle that <self> works towards, or
+        None if its target word is not in its word set and so can never
+        be reached.
+
+        @type self: WordLadderPuzzle
+        @rtype: WordLadderPuzzle | None
+
+        >>> print(WordLadderPuzzle("cab", "mow", {"cab", "mow"}).goal_state())
+        mow -> mow
+        >>> print(WordLadderPuzzle("cab", "mow", {"cab"}).goal_state())
+        None
+        """
+        if self._to_word not in self._word_set:
+            return None
+        return WordLadderPuzzle(self._to_word, self._to_word, self._word_set)
+
+    def heuristic(self):
+        """
+        Return the number of letters in which the current word of <self>
+        differs from the target word. Each extension changes one letter,
+        so this never overestimates the extensions still needed.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> WordLadderPuzzle("cab", "mow", {"cab", "mow"}).heuristic()
+        3
+        >>> WordLadderPuzzle("cow", "mow", {"cow", "mow"}).heuristic()
+        1
+        """
+        return (sum([a != b for a, b in zip(self._from_word, self._to_word)])
+                + abs(len(self._from_word) - len(self._to_word)))
+
     def is_solved(self):
         """
         Return whether Puzzle self is solved.
@@ -118,8 +184,7 @@ class WordLadderPuzzle(Puzzle):
         @type self: WordLadderPuzzle
         @rtype: bool
 
-        >>> f = open('words.txt', 'r')
-        >>> word_set = set(f.read().split())
+        >>> word_set = load_word_set('words.txt')
         >>> s = WordLadderPuzzle("zoom", "zoom", word_set)
         >>> s.is_solved()
         True
@@ -136,11 +201,14 @@ class WordLadderPuzzle(Puzzle):
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
-    from puzzle_tools import breadth_first_solve, depth_first_solve
+    from puzzle_tools import (breadth_first_solve, depth_first_solve,
+                              astar_solve, bidirectional_solve)
     from time import time
-    with open("words.txt", "r") as words:
-        word_set = set(words.read().split())
-    w = WordLadderPuzzle("same", "cost", word_set)
+    start = time()
+    index = WordIndex(load_word_set("words.txt"))
+    end = time()
+    print("Indexed {} words in {} seconds.".format(len(index), end - start))
+    w = WordLadderPuzzle("same", "cost", index)
     start = time()
     sol = breadth_first_solve(w)
     end = time()
@@ -153,3 +221,15 @@ if __name__ == '__main__':
     print("Solving word ladder from same->cost")
     print("...using depth-first-search")
     print("Solutions: {} took {} seconds.".format(sol, end - start))
+    start = time()
+    sol = astar_solve(w)
+    end = time()
+    print("Solving word ladder from same->cost")
+    print("...using A* search")
+    print("Solutions: {} took {} seconds.".format(sol, end - start))
+    start = time()
+    sol = bidirectional_solve(w)
+    end = time()
+    print("Solving word ladder from same->cost")
+    print("...using bidirectional breadth-first-search")
+    print("Solutions: {} took {} seconds.".format(sol, end - start))